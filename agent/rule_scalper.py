@@ -1,8 +1,14 @@
 import time
 import pandas as pd
 import MetaTrader5 as mt5
-from config import LOT_SIZE, MAX_OPEN_TRADES, TIMEFRAME_MINUTES
-from core.mt5_interface import get_ohlc_data, get_open_positions
+import config # MAX_OPEN_TRADES/SYMBOLS are hot-reloadable, read as config.X
+from config import TIMEFRAME_MINUTES, CYCLE_SAFETY_MARGIN_SECONDS, BUILD_OBSERVATIONS
+from core.mt5_interface import get_ohlc_data, select_symbol
+from core.models import MarketState
+from core.cycle_budget import CycleBudget
+from core.connection_manager import connection
+from core.portfolio_analytics import PortfolioAnalytics
+from core.exporter import exporter
 
 from core.order_manager import OrderManager
 from utils.logger import setup_logger
@@ -10,9 +16,17 @@ from utils.logger import setup_logger
 logger = setup_logger("RuleScalper")
 
 class RuleBasedScalper:
-    def __init__(self, symbols):
+    def __init__(self, symbols, scanner=None):
         self.symbols = symbols
-        self.order_manager = OrderManager()
+        self.scanner = scanner # Optional MarketScanner for large watchlists
+        self.market = MarketState() # Positions/ticks/specs, positions synced once per cycle
+        self.order_manager = OrderManager(self.market)
+        self.budget = CycleBudget(TIMEFRAME_MINUTES * 60, safety_margin=CYCLE_SAFETY_MARGIN_SECONDS)
+        self.pending_signals = set() # Symbols with a non-neutral M5 bias waiting for an M1 entry
+        self.observations = {} # symbol -> latest MarketFeatures (low priority, text rendered on demand)
+        self.portfolio = PortfolioAnalytics()
+        self.exported_bars = {} # (symbol, timeframe) -> time of the last exported closed bar
+        self.cycle_frames = {} # symbol -> (df_m1, df_m5) with indicators, fetched by check_signals this cycle
 
     def get_data_multi_timeframe(self, symbol):
         """Fetches M1 and M5 data for the symbol."""
@@ -43,20 +57,71 @@ class RuleBasedScalper:
         
         return df
 
+    def export_bars(self, symbol, timeframe, df):
+        """Queues closed bars (with indicators) not exported yet. The live bar is excluded."""
+        if not exporter.enabled:
+            return
+        closed = df.iloc[:-1]
+        last = self.exported_bars.get((symbol, timeframe))
+        new = closed[closed['time'] > last] if last is not None else closed.iloc[-1:]
+        if new.empty:
+            return
+        self.exported_bars[(symbol, timeframe)] = new['time'].iloc[-1]
+        for bar in new.itertuples(index=False):
+            exporter.record("bars", {
+                "time": bar.time.timestamp(), "symbol": symbol, "timeframe": timeframe,
+                "open": bar.open, "high": bar.high, "low": bar.low, "close": bar.close,
+                "tick_volume": int(bar.tick_volume), "spread": int(bar.spread),
+                "ema_20": bar.ema_20, "ema_50": bar.ema_50, "atr": bar.atr,
+            })
+
+    def export_closed_bars(self, symbols):
+        """
+        Bar export pass, independent of signal gating, so symbols skipped by
+        max trades, the budget or the scanner still get their bars. Runs as
+        deferred work; a skipped pass is caught up from the 100-bar window.
+        Reuses the frames check_signals computed; only skipped symbols are fetched.
+        """
+        for symbol in symbols:
+            frames = self.cycle_frames.get(symbol)
+            if frames is None:
+                df_m1, df_m5 = self.get_data_multi_timeframe(symbol)
+                if df_m1 is None or df_m5 is None:
+                    continue
+                frames = (self.calculate_indicators(df_m1), self.calculate_indicators(df_m5))
+            self.export_bars(symbol, "M1", frames[0])
+            self.export_bars(symbol, "M5", frames[1])
+
+    def record_signal(self, symbol, strategy, action, reason, atr=None):
+        """Exports one signal decision; action is None when the signal was rejected."""
+        accepted = action is not None
+        if accepted and not self.order_manager.allow_entries:
+            accepted = False
+            reason += " (entry suppressed, late start)"
+        exporter.record("signals", {
+            "time": time.time(), "symbol": symbol, "strategy": strategy,
+            "action": action, "accepted": accepted, "reason": reason,
+            "atr": float(atr) if atr is not None else None,
+        })
+
     def check_signals(self, symbol):
         # 1. Check Open Trades
-        positions = get_open_positions(symbol)
-        if len(positions) >= MAX_OPEN_TRADES:
-            logger.info(f"{symbol}: Max trades reached ({len(positions)}). Skipping.")
+        open_count = self.market.positions.count(symbol)
+        if open_count >= config.MAX_OPEN_TRADES:
+            logger.info(f"{symbol}: Max trades reached ({open_count}). Skipping.")
+            self.record_signal(symbol, "pullback", None, "Max trades reached")
             return
 
         # 2. Get Data
         df_m1, df_m5 = self.get_data_multi_timeframe(symbol)
-        if df_m1 is None or df_m5 is None: return
+        if df_m1 is None or df_m5 is None:
+            self.record_signal(symbol, "pullback", None, "No data")
+            return
 
         # 3. Calculate Indicators
         df_m1 = self.calculate_indicators(df_m1)
         df_m5 = self.calculate_indicators(df_m5)
+        self.cycle_frames[symbol] = (df_m1, df_m5) # Reused by the bar export pass
         
         # 4. Analyze M5 Trend Logic
         # Last closed M5 candle (iloc[-1] is current open, -2 is last closed)
@@ -71,7 +136,9 @@ class RuleBasedScalper:
             m5_bias = "BEARISH"
             
         if m5_bias == "NEUTRAL":
+            self.pending_signals.discard(symbol)
             logger.info(f"{symbol}: M5 Bias Neutral (EMA20={m5_prev['ema_20']:.2f}, EMA50={m5_prev['ema_50']:.2f}). Waiting.")
+            self.record_signal(symbol, "pullback", None, "M5 Bias Neutral")
             return
 
         # 5. Analyze M1 Entry Logic (Pullback)
@@ -101,6 +168,7 @@ class RuleBasedScalper:
             if is_near_ema and is_bullish_close:
                 logger.info(f"SIGNAL FOUND: {symbol} BUY (M5 Bullish + M1 Pullback)")
                 action = "BUY"
+                signal_time = time.time()
 
         elif m5_bias == "BEARISH":
             # Rule: M1 Price pulls back near EMA20 then bearish candle closes.
@@ -113,9 +181,12 @@ class RuleBasedScalper:
             if is_near_ema and is_bearish_close:
                 logger.info(f"SIGNAL FOUND: {symbol} SELL (M5 Bearish + M1 Pullback)")
                 action = "SELL"
+                signal_time = time.time()
 
         # 6. Execute
         if action:
+            self.pending_signals.discard(symbol)
+            self.record_signal(symbol, "pullback", action, f"M5 {m5_bias.capitalize()} + M1 Pullback", atr)
             # Setup SL/TP
             # SL = ATR based (e.g., 2x ATR below Low for Buy)
             # User: "SL ATR-based... TP 1.2-1.5 x ATR"
@@ -130,9 +201,10 @@ class RuleBasedScalper:
             # Actually OrderManager logic for SL/TP is inside `place_market_order` using passed ATR.
             # Let's use that to keep it consistent.
             
-            self.order_manager.execute_action(symbol, action, atr=atr, confidence=1.0)
-
-            self.order_manager.execute_action(symbol, action, atr=atr, confidence=1.0)
+            self.order_manager.execute_action(symbol, action, atr=atr, confidence=1.0, strategy="pullback", signal_time=signal_time)
+        else:
+            self.pending_signals.add(symbol) # Bias set, entry may come next bar
+            self.record_signal(symbol, "pullback", None, f"M5 {m5_bias.capitalize()}, no M1 Pullback", atr)
 
     def check_breakout_signals(self, symbol):
         """
@@ -146,7 +218,9 @@ class RuleBasedScalper:
         # 1. Get Data (M5 for Breakout?)
         # User said "2 strategy rule base". Let's use M5 for breakout to capture bigger moves.
         df = get_ohlc_data(symbol, n=50, timeframe=mt5.TIMEFRAME_M5)
-        if df is None: return
+        if df is None:
+            self.record_signal(symbol, "breakout", None, "No data")
+            return
         
         # Indicators
         df = self.calculate_indicators(df)
@@ -160,7 +234,9 @@ class RuleBasedScalper:
         # 0 is oldest. -1 is current. -2 is last closed.
         range_window = df.iloc[-21:-1]
         
-        if len(range_window) < 20: return
+        if len(range_window) < 20:
+            self.record_signal(symbol, "breakout", None, "Not enough bars")
+            return
         
         highest_high = range_window['high'].max()
         lowest_low = range_window['low'].min()
@@ -174,9 +250,12 @@ class RuleBasedScalper:
         last_closed = df.iloc[-2]
         
         atr = last_closed['atr']
-        if pd.isna(atr) or atr == 0: return
+        if pd.isna(atr) or atr == 0:
+            self.record_signal(symbol, "breakout", None, "ATR unavailable")
+            return
 
         action = None
+        reason = "Inside 20-bar range"
         
         # Check Breakout
         # Buy: Close > Highest High
@@ -184,23 +263,104 @@ class RuleBasedScalper:
             # Check if it wasn't already above (avoid multiple signals for same breakout)
             # Look at candle before that (-3)
             prev_prev = df.iloc[-3]
+            reason = "Breakout already signalled"
             if prev_prev['close'] <= highest_high:
                 logger.info(f"BREAKOUT SIGNAL: {symbol} BUY (Close {last_closed['close']} > 20 High {highest_high})")
                 action = "BUY"
+                reason = "Close > 20 High"
+                signal_time = time.time()
                 
         # Sell: Close < Lowest Low
         elif last_closed['close'] < lowest_low:
              prev_prev = df.iloc[-3]
+             reason = "Breakout already signalled"
              if prev_prev['close'] >= lowest_low:
                 logger.info(f"BREAKOUT SIGNAL: {symbol} SELL (Close {last_closed['close']} < 20 Low {lowest_low})")
                 action = "SELL"
-                
+                reason = "Close < 20 Low"
+                signal_time = time.time()
+
+        self.record_signal(symbol, "breakout", action, reason, atr)
         if action:
-            self.order_manager.execute_action(symbol, action, atr=atr, confidence=1.0)
+            self.order_manager.execute_action(symbol, action, atr=atr, confidence=1.0, strategy="breakout", signal_time=signal_time)
+
+    def prioritize(self, symbols, with_positions):
+        """
+        Orders symbols so the most important work runs first when the budget is short:
+        1. Symbols with open positions
+        2. Symbols with a pending signal (M5 bias set, waiting for M1 entry)
+        3. Everything else
+        """
+        def rank(symbol):
+            if symbol in with_positions: return 0
+            if symbol in self.pending_signals: return 1
+            return 2
+        return sorted(symbols, key=rank)
+
+    def build_observations(self, symbols):
+        from core.market_analyzer import build_features
+        self.observations.update(build_features(symbols, self.market))
+
+    def apply_config(self, changes):
+        """Applies hot-reloaded settings the agent keeps its own copy of. Called between cycles."""
+        symbols = changes.get("SYMBOLS")
+        if symbols is None:
+            return
+        if self.scanner:
+            logger.info("SYMBOLS reloaded but scanner mode uses SCANNER_WATCHLIST. Ignored.")
+            return
+        for symbol in symbols:
+            if symbol not in self.symbols:
+                select_symbol(symbol)
+        self.symbols = list(symbols)
+        self.pending_signals.intersection_update(self.symbols)
+        logger.info(f"Watchlist reloaded: {self.symbols}")
+
+    def resync(self):
+        """Drops state that may be stale after a terminal reconnect."""
+        self.pending_signals.clear()
+        self.observations.clear()
+        self.market.invalidate()
+        if self.scanner:
+            self.scanner.points.clear()
 
     def run_cycle(self):
+        if not connection.is_available() and not connection.check(force=True):
+            logger.warning(f"Terminal disconnected (breaker {connection.state}). Skipping cycle.")
+            return
+
         logger.info("--- Starting Scalp & Breakout Cycle ---")
-        for symbol in self.symbols:
+        budget = self.budget
+        budget.start()
+        self.cycle_frames.clear()
+        # Late start: held symbols are still evaluated, but no new entries are sent
+        self.order_manager.allow_entries = not budget.is_late()
+
+        self.market.sync_positions() # One positions_get for every symbol this cycle
+        with_positions = set(self.market.positions.symbols()) # Snapshot: orders and reconnects mutate the book mid-cycle
+
+        symbols = self.symbols
+        if self.scanner:
+            # Only the top-K scanner candidates get the detailed checks,
+            # plus any watchlist symbol we already hold. Late cycles skip the scan.
+            candidates = self.scanner.scan() if not budget.is_late() else []
+            held = [s for s in self.scanner.symbols if s in with_positions and s not in candidates]
+            symbols = candidates + held
+
+        symbols = self.prioritize(symbols, with_positions)
+
+        for symbol in symbols:
+            if budget.expired():
+                budget.skip(symbol)
+                self.record_signal(symbol, None, None, "Cycle budget expired")
+                continue
+
+            # Bar is stale: don't open new trades, only symbols holding positions get processed
+            if budget.is_late() and symbol not in with_positions:
+                budget.skip(f"{symbol} entries (late start)")
+                self.record_signal(symbol, None, None, "Late start")
+                continue
+
             try:
                 # Strategy 1: Pullback Scalper
                 self.check_signals(symbol)
@@ -210,3 +370,12 @@ class RuleBasedScalper:
                 
             except Exception as e:
                 logger.error(f"Error processing {symbol}: {e}")
+
+        if BUILD_OBSERVATIONS:
+            # One batched feature build for every symbol, only if time is left
+            budget.defer("observations", self.build_observations, symbols)
+        budget.defer("portfolio sync", self.portfolio.sync)
+        if exporter.enabled:
+            budget.defer("bar export", self.export_closed_bars, list(dict.fromkeys([*self.symbols, *with_positions])))
+        budget.run_deferred()
+        budget.finish()
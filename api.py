@@ -1,37 +1,49 @@
-from fastapi import FastAPI, HTTPException
+from utils.startup_timer import startup_timer # First import: starts the startup clock
+with startup_timer.phase("import fastapi"):
+    from fastapi import FastAPI, HTTPException
 import subprocess
 import os
 import signal
 import sys
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Optional
 from contextlib import asynccontextmanager
 
+# Heavy modules (pandas, MetaTrader5, analytics) are only
+# imported inside the endpoints that need them, keeping cold start fast.
+
 # Global process reference
 agent_process: Optional[subprocess.Popen] = None
+standby_process: Optional[subprocess.Popen] = None # Warm standby waiting to take over (POST /upgrade)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Launch Agent automatically
     global agent_process
     try:
-        if not agent_process:
-            print("AUTO-START: Initializing...")
-            # Logs created by main.py/config.py
-            
-            # Use sys.executable to ensure we use the same python env
-            cmd = [sys.executable, "main.py"]
-            # Start detached/background
-            agent_process = subprocess.Popen(cmd, cwd=os.getcwd())
-            print(f"AUTO-START: Agent launched with PID {agent_process.pid}")
+        with startup_timer.phase("agent spawn"):
+            if not agent_process:
+                print("AUTO-START: Initializing...")
+                # Logs created by main.py/config.py
+
+                # Use sys.executable to ensure we use the same python env
+                cmd = [sys.executable, "main.py"]
+                # Start detached/background
+                agent_process = subprocess.Popen(cmd, cwd=os.getcwd())
+                print(f"AUTO-START: Agent launched with PID {agent_process.pid}")
     except Exception as e:
         print(f"AUTO-START FAILED: {e}")
-        
+
+    print(f"API ready in {startup_timer.mark_ready():.0f} ms {startup_timer.as_dict()['phases_ms']}")
     yield
     
     # Shutdown: Cleanup
     if agent_process:
         print("SHUTDOWN: Terminating Agent...")
         agent_process.terminate()
+    if standby_process and standby_process.poll() is None:
+        standby_process.terminate()
 
 app = FastAPI(title="AI Trading Agent Control Panel", lifespan=lifespan)
 
@@ -40,7 +52,8 @@ def read_root():
     return {
         "status": "online", 
         "message": "AI Trading Agent API is ready",
-        "agent_running": agent_process is not None and agent_process.poll() is None
+        "agent_running": agent_process is not None and agent_process.poll() is None,
+        "startup": startup_timer.as_dict()
     }
 
 @app.post("/start")
@@ -65,6 +78,10 @@ def stop_agent():
         return {"status": "error", "message": "Agent is not running"}
     
     try:
+        # A standby waiting for this agent would never be released
+        if standby_process and standby_process.poll() is None:
+            standby_process.terminate()
+
         # Terminate the process
         agent_process.terminate()
         try:
@@ -81,11 +98,86 @@ def stop_agent():
 def get_status():
     global agent_process
     is_running = agent_process is not None and agent_process.poll() is None
+    standby_running = standby_process is not None and standby_process.poll() is None
     return {
         "running": is_running,
-        "pid": agent_process.pid if is_running else None
+        "pid": agent_process.pid if is_running else None,
+        "standby_pid": standby_process.pid if standby_running else None
     }
 
+def _promote_standby(old, new):
+    """
+    Makes the standby the tracked agent once the old one has exited after a
+    handover. If the old agent died without releasing (crash), the release is
+    written on its behalf so the standby takes over now instead of timing out.
+    """
+    global agent_process, standby_process
+    from core import handover
+    while old.poll() is None:
+        if new.poll() is not None:
+            # Standby failed or timed out; the old agent keeps trading
+            standby_process = None
+            return
+        time.sleep(0.5)
+    if not handover.released():
+        print(f"UPGRADE: Agent {old.pid} exited without handover, releasing to standby {new.pid}")
+        handover.release()
+    if new.poll() is None and agent_process is old:
+        agent_process = new
+    standby_process = None
+
+@app.post("/upgrade")
+def start_standby():
+    """
+    Starts a warm standby agent (main.py --standby). It connects and preloads
+    data while the current agent keeps trading, then takes over at the next
+    bar boundary. Use after a code deploy to restart without missing a bar.
+    """
+    global standby_process
+    if not agent_process or agent_process.poll() is not None:
+        return {"status": "error", "message": "Agent is not running, use /start"}
+    if standby_process and standby_process.poll() is None:
+        return {"status": "error", "message": "Standby is already running"}
+
+    from core import handover
+    handover.clear() # A release left from an earlier upgrade would be taken as immediate
+    try:
+        standby_process = subprocess.Popen([sys.executable, "main.py", "--standby"], cwd=os.getcwd())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    threading.Thread(target=_promote_standby, args=(agent_process, standby_process), daemon=True).start()
+    return {"status": "success", "message": "Standby started, takeover at next bar", "pid": standby_process.pid}
+
+@app.get("/config")
+def get_runtime_config():
+    """Hot-reloadable settings: file defaults and the active overrides."""
+    import config
+    from core.runtime_config import RELOADABLE, read_overrides
+    try:
+        return {
+            "defaults": {k: getattr(config, k) for k in RELOADABLE},
+            "overrides": read_overrides()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/config")
+def update_runtime_config(changes: Dict[str, Any]):
+    """
+    Merges `changes` into the override file. The running agent validates and
+    applies them at its next cycle boundary, without a restart.
+    """
+    from core.runtime_config import read_overrides, write_overrides
+    try:
+        overrides = read_overrides()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading runtime config: {str(e)}")
+    overrides.update(changes)
+    errors = write_overrides(overrides)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    return {"status": "success", "overrides": overrides, "message": "Applied at the next cycle"}
+
 @app.get("/logs")
 def get_logs(lines: int = 50):
     from config import LOG_FILE
@@ -100,8 +192,39 @@ def get_logs(lines: int = 50):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading logs: {str(e)}")
 
+# Cached portfolio snapshot: (mtime, summary). Re-read only when the agent writes a new one.
+_portfolio_cache = (None, None)
+
+def _load_portfolio_summary():
+    global _portfolio_cache
+    import json
+    from config import PORTFOLIO_SNAPSHOT
+    if not os.path.exists(PORTFOLIO_SNAPSHOT):
+        return None
+    mtime = os.path.getmtime(PORTFOLIO_SNAPSHOT)
+    if _portfolio_cache[0] != mtime:
+        with open(PORTFOLIO_SNAPSHOT, "r") as f:
+            _portfolio_cache = (mtime, json.load(f)["summary"])
+    return _portfolio_cache[1]
+
 @app.get("/stats")
 def get_stats():
+    # Preferred: incremental portfolio analytics maintained by the agent (O(1) to serve)
+    try:
+        summary = _load_portfolio_summary()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading portfolio snapshot: {str(e)}")
+    if summary:
+        overall = summary["overall"]
+        return {
+            "total_trades": overall["trades"],
+            "wins": overall["wins"],
+            "losses": overall["losses"],
+            "win_rate": f"{overall['win_rate']:.2f}%",
+            "portfolio": summary
+        }
+
+    # Fallback: count [TRADE_RESULT] lines in the log
     from config import LOG_FILE
     if not os.path.exists(LOG_FILE):
         return {"error": "No logs found"}
@@ -137,6 +260,51 @@ def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/execution")
+def get_execution_stats(symbol: Optional[str] = None, strategy: Optional[str] = None):
+    """Signal-to-fill latency percentiles and slippage distribution per symbol, hour and strategy."""
+    from core.execution_analytics import load_executions, execution_report
+    try:
+        records = load_executions()
+        if symbol:
+            records = [r for r in records if r.get("symbol") == symbol]
+        if strategy:
+            records = [r for r in records if r.get("strategy") == strategy]
+        if not records:
+            return {"error": "No executions recorded"}
+        return execution_report(records)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/risk/montecarlo")
+def get_monte_carlo(lots: str = "0.5,1,2", paths: int = 100000, block: int = 1, days: Optional[int] = None, equity: float = 20000.0):
+    """Bootstrap risk simulation of the recorded trade list for several lot sizes."""
+    from config import TRADES_FILE
+    if not os.path.exists(TRADES_FILE):
+        return {"error": "No trade journal found"}
+    if paths < 1 or paths > 1000000:
+        raise HTTPException(status_code=400, detail="paths must be between 1 and 1,000,000")
+    if block < 1:
+        raise HTTPException(status_code=400, detail="block must be >= 1")
+    if days is not None and days < 1:
+        raise HTTPException(status_code=400, detail="days must be >= 1")
+
+    try:
+        lot_sizes = [float(x) for x in lots.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="lots must be comma separated numbers")
+    if not lot_sizes or any(l <= 0 for l in lot_sizes):
+        raise HTTPException(status_code=400, detail="lots must be positive")
+
+    from backtest.monte_carlo import load_trades_file, run
+    try:
+        profits, times = load_trades_file(TRADES_FILE)
+        if len(profits) == 0:
+            return {"error": "Trade journal is empty"}
+        return run(profits, times, lot_sizes, n_paths=paths, block=block, equity=equity, days=days)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
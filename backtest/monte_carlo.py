@@ -0,0 +1,216 @@
+"""
+Vectorized Monte Carlo risk simulator for trade sequences.
+
+Resamples a historical trade list (bootstrap or block bootstrap) into many
+equity paths at once as a (paths x trades) numpy batch and reports, per lot
+size: drawdown quantiles, probability of breaching MAX_DAILY_DRAWDOWN_PERCENT
+on any day, and risk of ruin.
+
+Trades are profit per 1.0 lot in account currency, so any LOT_SIZE can be
+evaluated from the same history.
+
+Usage:
+    python -m backtest.monte_carlo --trades logs/trades.jsonl --lots 0.5,1,2 --paths 100000
+    python -m backtest.monte_carlo --history-days 90 --lots 1,2,5
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+
+from config import MAX_DAILY_DRAWDOWN_PERCENT, TRADES_FILE, MAGIC_NUMBER
+
+DEFAULT_EQUITY = 20000.0 # Same fallback as OrderManager dynamic sizing
+DEFAULT_RUIN_PERCENT = 50.0 # Path is "ruined" once equity loses this much
+CHUNK_ELEMENTS = 5_000_000 # Paths x trades per batch (~20 MB float32)
+QUANTILES = (50, 90, 95, 99)
+
+
+# --- Trade sources ---
+
+def load_trades_file(path=TRADES_FILE):
+    """
+    JSON lines with profit, volume and time (unix seconds), as written by
+    backtest.walk_forward --trades-out or the portfolio trade journal.
+    Returns (profit_per_lot, times).
+    """
+    profits, times = [], []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            t = json.loads(line)
+            volume = t.get("volume") or 1.0
+            profits.append(t["profit"] / volume)
+            times.append(t.get("time", 0))
+    return np.array(profits, dtype=np.float64), np.array(times, dtype=np.int64)
+
+
+def load_trades_history(days):
+    """Closed deals (entry OUT) of this agent from the terminal's deal history."""
+    import MetaTrader5 as mt5
+    from core.mt5_interface import initialize_mt5
+
+    if not initialize_mt5():
+        raise RuntimeError("MT5 not available")
+    deals = mt5.history_deals_get(datetime.now() - timedelta(days=days), datetime.now())
+    if deals is None:
+        raise RuntimeError(f"history_deals_get failed: {mt5.last_error()}")
+
+    profits, times = [], []
+    entry_commission = {} # position_id -> commission of the entry deal, added at the first exit
+    for d in sorted(deals, key=lambda d: d.ticket):
+        if d.magic != MAGIC_NUMBER:
+            continue
+        if d.entry == mt5.DEAL_ENTRY_IN:
+            entry_commission[d.position_id] = entry_commission.get(d.position_id, 0.0) + d.commission
+            continue
+        if d.entry != mt5.DEAL_ENTRY_OUT or not d.volume:
+            continue
+        pnl = d.profit + d.commission + d.swap + entry_commission.pop(d.position_id, 0.0)
+        profits.append(pnl / d.volume)
+        times.append(d.time)
+    return np.array(profits, dtype=np.float64), np.array(times, dtype=np.int64)
+
+
+def trades_per_day(times):
+    """Average trades per active trading day (at least 1)."""
+    if len(times) == 0 or not times.any():
+        return 1
+    days = len(np.unique(times // 86400))
+    return max(1, int(round(len(times) / days)))
+
+
+# --- Simulation ---
+
+def sample_indices(rng, n_trades, n_paths, horizon, block):
+    """(n_paths x horizon) trade indices. block=1 is an i.i.d. bootstrap,
+    block>1 is a circular block bootstrap (keeps streaks / autocorrelation)."""
+    if block <= 1:
+        return rng.integers(0, n_trades, size=(n_paths, horizon), dtype=np.int32)
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, n_trades, size=(n_paths, n_blocks, 1), dtype=np.int32)
+    idx = (starts + np.arange(block)) % n_trades
+    return idx.reshape(n_paths, -1)[:, :horizon]
+
+
+def simulate(profit_per_lot, lots, n_paths=100_000, horizon=None, block=1, per_day=1,
+             equity=DEFAULT_EQUITY, daily_limit=MAX_DAILY_DRAWDOWN_PERCENT,
+             ruin_percent=DEFAULT_RUIN_PERCENT, seed=None):
+    """
+    Runs n_paths resampled equity paths of `horizon` trades for every lot size.
+    Returns {lot: {...metrics...}}.
+    """
+    profit_per_lot = np.asarray(profit_per_lot, dtype=np.float64)
+    if len(profit_per_lot) == 0:
+        raise ValueError("No trades to resample")
+    horizon = horizon or len(profit_per_lot)
+    per_day = max(1, min(per_day, horizon))
+    n_days = -(-horizon // per_day)
+    padded = n_days * per_day
+    ruin_level = equity * (1 - ruin_percent / 100.0)
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, CHUNK_ELEMENTS // padded)
+
+    max_dd = {lot: [] for lot in lots}
+    final = {lot: [] for lot in lots}
+    daily_hits = {lot: 0 for lot in lots}
+    ruined = {lot: 0 for lot in lots}
+
+    # float32 halves memory traffic; precision is ample for risk quantiles
+    profit_per_lot = profit_per_lot.astype(np.float32)
+
+    done = 0
+    while done < n_paths:
+        size = min(chunk, n_paths - done)
+        cum = np.zeros((size, padded), dtype=np.float32)
+        cum[:, :horizon] = profit_per_lot[sample_indices(rng, len(profit_per_lot), size, horizon, block)]
+
+        # PnL scales linearly with lot size, so every path statistic is computed
+        # once per batch at 1 lot and only rescaled per lot:
+        #   curve = equity + lot * cum,  peak = equity + lot * run_max
+        np.cumsum(cum, axis=1, out=cum)
+        run_max = np.maximum.accumulate(cum, axis=1)
+        np.maximum(run_max, 0.0, out=run_max)
+        lowest = cum.min(axis=1)
+        final_pnl = cum[:, -1].astype(np.float64)
+
+        # Intraday drawdown vs. the equity at the start of each day
+        day_open = np.zeros((size, n_days), dtype=np.float32)
+        day_open[:, 1:] = cum[:, per_day - 1:-1:per_day]
+        intraday = np.maximum(day_open - cum.reshape(size, n_days, per_day).min(axis=2), 0.0)
+
+        underwater = np.subtract(run_max, cum, out=cum) # cum is not needed after this
+        for lot in lots:
+            max_dd[lot].append((underwater / (equity / lot + run_max)).max(axis=1) * 100)
+            final[lot].append(equity + lot * final_pnl)
+            ruined[lot] += int((equity + lot * lowest <= ruin_level).sum())
+            daily_dd = lot * intraday / np.maximum(equity + lot * day_open, 1e-9) * 100
+            daily_hits[lot] += int((daily_dd >= daily_limit).any(axis=1).sum())
+        done += size
+
+    results = {}
+    for lot in lots:
+        dd = np.concatenate(max_dd[lot])
+        eq = np.concatenate(final[lot])
+        results[lot] = {
+            "max_drawdown_pct": {f"p{q}": round(float(v), 2) for q, v in zip(QUANTILES, np.percentile(dd, QUANTILES))},
+            "final_equity": {f"p{q}": round(float(v), 2) for q, v in zip((5, 50, 95), np.percentile(eq, (5, 50, 95)))},
+            "prob_daily_limit": round(daily_hits[lot] / n_paths, 4),
+            "risk_of_ruin": round(ruined[lot] / n_paths, 4),
+        }
+    return results
+
+
+def run(profit_per_lot, times, lots, n_paths=100_000, block=1, equity=DEFAULT_EQUITY, days=None, seed=None):
+    """Convenience wrapper used by the CLI and the API."""
+    per_day = trades_per_day(times)
+    horizon = days * per_day if days else len(profit_per_lot)
+    start = time.perf_counter()
+    results = simulate(profit_per_lot, lots, n_paths=n_paths, horizon=horizon, block=block,
+                       per_day=per_day, equity=equity, seed=seed)
+    return {
+        "trades": int(len(profit_per_lot)),
+        "mean_profit_per_lot": round(float(np.mean(profit_per_lot)), 4),
+        "trades_per_day": per_day,
+        "horizon_trades": horizon,
+        "paths": n_paths,
+        "block": block,
+        "equity": equity,
+        "daily_limit_pct": MAX_DAILY_DRAWDOWN_PERCENT,
+        "ruin_pct": DEFAULT_RUIN_PERCENT,
+        "seconds": round(time.perf_counter() - start, 2),
+        "by_lot": {str(lot): r for lot, r in results.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo risk simulation of a trade list")
+    parser.add_argument("--trades", default=TRADES_FILE, help="JSON lines trade file")
+    parser.add_argument("--history-days", type=int, help="Use closed deals from MT5 history instead")
+    parser.add_argument("--lots", default="0.5,1,2", help="Comma separated lot sizes")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--block", type=int, default=1, help="Block length (1 = i.i.d. bootstrap)")
+    parser.add_argument("--days", type=int, help="Horizon in trading days (default: length of history)")
+    parser.add_argument("--equity", type=float, default=DEFAULT_EQUITY)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.history_days:
+        profits, times = load_trades_history(args.history_days)
+    else:
+        if not os.path.exists(args.trades):
+            parser.error(f"Trade file not found: {args.trades}")
+        profits, times = load_trades_file(args.trades)
+
+    lots = [float(x) for x in args.lots.split(",")]
+    report = run(profits, times, lots, args.paths, args.block, args.equity, args.days, args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Walk-forward evaluation of the RuleBasedScalper strategies.
+
+Indicator series (EMAs, ATR, breakout ranges, M5 bias aligned to M1) and the
+entry signals for every parameter value are computed ONCE over the full
+history. Each train/test fold then works on numpy slices (views) of those
+arrays, so nothing is recomputed or copied per fold. Folds run in parallel
+worker processes that inherit the precomputed series.
+
+Usage:
+    python -m backtest.walk_forward --symbol XAUUSD --strategy pullback --bars 50000
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from core.indicators import ema, atr, rolling_max, rolling_min
+from utils.logger import setup_logger
+
+logger = setup_logger("WalkForward")
+
+# Parameter grids searched on every train window.
+# sl_atr / tp_atr default in OrderManager.place_market_order: 1.5 / 2.0
+PULLBACK_GRID = {
+    "near_atr": [0.1, 0.2, 0.3],   # check_signals: "near EMA20" tolerance in ATR
+    "sl_atr": [1.0, 1.5, 2.0],
+    "tp_atr": [1.5, 2.0, 3.0],
+}
+BREAKOUT_GRID = {
+    "lookback": [10, 20, 30],      # check_breakout_signals: range length
+    "sl_atr": [1.0, 1.5, 2.0],
+    "tp_atr": [1.5, 2.0, 3.0],
+}
+MAX_HOLD_BARS = 240 # Force exit after this many bars
+
+M1_SECONDS = 60
+M5_SECONDS = 300
+
+# Set in each worker process by _init_worker. initargs are pickled once per worker
+# at pool start (always on Windows, which uses spawn), never once per fold.
+_SERIES = None
+
+
+# --- Data ---
+
+def rates_to_arrays(rates):
+    """MT5 structured rates array -> dict of contiguous float/int arrays."""
+    return {
+        "time": np.ascontiguousarray(rates["time"], dtype=np.int64),
+        "open": np.ascontiguousarray(rates["open"], dtype=np.float64),
+        "high": np.ascontiguousarray(rates["high"], dtype=np.float64),
+        "low": np.ascontiguousarray(rates["low"], dtype=np.float64),
+        "close": np.ascontiguousarray(rates["close"], dtype=np.float64),
+    }
+
+
+def load_history_mt5(symbol, m1_bars):
+    """Loads M1 and matching M5 history from the terminal. Returns (m1, m5, contract_size)."""
+    import MetaTrader5 as mt5
+    from core.mt5_interface import initialize_mt5, get_rates_array, get_symbol_info, select_symbol
+
+    if not initialize_mt5():
+        raise RuntimeError("MT5 not available")
+    select_symbol(symbol)
+    m1 = get_rates_array(symbol, mt5.TIMEFRAME_M1, m1_bars)
+    m5 = get_rates_array(symbol, mt5.TIMEFRAME_M5, m1_bars // 5 + 100)
+    if m1 is None or m5 is None:
+        raise RuntimeError(f"No history for {symbol}")
+    info = get_symbol_info(symbol)
+    contract_size = info.trade_contract_size if info else 1.0
+    return rates_to_arrays(m1), rates_to_arrays(m5), contract_size
+
+
+def load_history_csv(m1_path, m5_path):
+    """CSV files with columns time (unix seconds), open, high, low, close."""
+    import pandas as pd
+    def _load(path):
+        df = pd.read_csv(path)
+        return {c: df[c].to_numpy(dtype=np.int64 if c == "time" else np.float64) for c in ("time", "open", "high", "low", "close")}
+    return _load(m1_path), _load(m5_path), 1.0
+
+
+# --- Precomputation (once over the full history) ---
+
+def m5_bias(m5):
+    """+1 / -1 / 0 per M5 bar, same rule as check_signals (on a closed bar)."""
+    bias = np.zeros(len(m5["close"]), dtype=np.int8)
+    bias[(m5["ema_20"] > m5["ema_50"]) & (m5["close"] > m5["ema_20"])] = 1
+    bias[(m5["ema_20"] < m5["ema_50"]) & (m5["close"] < m5["ema_20"])] = -1
+    return bias
+
+
+def precompute(m1, m5, strategy):
+    """
+    Computes every indicator series and the entry signals for every
+    signal-shaping grid value. Returns the bar arrays the strategy trades on.
+    """
+    start = time.perf_counter()
+    for bars in (m1, m5):
+        bars["ema_20"] = ema(bars["close"], 20)
+        bars["atr"] = atr(bars["high"], bars["low"], bars["close"], 14)
+    m5["ema_50"] = ema(m5["close"], 50)
+
+    signals = {}
+    if strategy == "pullback":
+        # M5 bias known when M1 bar i closes = last M5 bar closed by then
+        closed_m5 = np.searchsorted(m5["time"] + M5_SECONDS, m1["time"] + M1_SECONDS, side="right") - 1
+        bias = np.where(closed_m5 >= 0, m5_bias(m5)[np.maximum(closed_m5, 0)], 0)
+
+        low, high, ema_20, a = m1["low"], m1["high"], m1["ema_20"], m1["atr"]
+        bullish = m1["close"] > m1["open"]
+        bearish = m1["close"] < m1["open"]
+        for near in PULLBACK_GRID["near_atr"]:
+            buy = (bias == 1) & ((low <= ema_20) | (np.abs(low - ema_20) < a * near)) & bullish
+            sell = (bias == -1) & ((high >= ema_20) | (np.abs(high - ema_20) < a * near)) & bearish
+            signals[("near_atr", near)] = (buy, sell)
+        bars = m1
+    else:
+        close = m5["close"]
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        for lookback in BREAKOUT_GRID["lookback"]:
+            # Range of the `lookback` bars before bar j (excludes j itself)
+            range_high = np.concatenate(([np.nan], rolling_max(m5["high"], lookback)[:-1]))
+            range_low = np.concatenate(([np.nan], rolling_min(m5["low"], lookback)[:-1]))
+            buy = (close > range_high) & (prev_close <= range_high)
+            sell = (close < range_low) & (prev_close >= range_low)
+            signals[("lookback", lookback)] = (buy, sell)
+        bars = m5
+
+    bars["signals"] = signals
+    logger.info(f"Precomputed {strategy} series over {len(bars['close'])} bars in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return bars
+
+
+# --- Simulation (on views of the precomputed arrays) ---
+
+def simulate(series, buy, sell, start, end, sl_atr, tp_atr):
+    """
+    One position at a time, entry at the next bar's open, ATR-based SL/TP.
+    If SL and TP are both touched in the same bar, SL is assumed (conservative).
+    Only bars in [start, end) are used; open trades are closed at end.
+    Returns a list of (entry_time, exit_time, side, pnl) with pnl in price units.
+    """
+    o, h, l, c, t, a = (series[k] for k in ("open", "high", "low", "close", "time", "atr"))
+    signal_idx = np.flatnonzero(buy[start:end - 1] | sell[start:end - 1]) + start
+
+    trades = []
+    next_free = start
+    for i in signal_idx:
+        e = i + 1
+        if e < next_free or not a[i] > 0:
+            continue
+        side = 1 if buy[i] else -1
+        entry = o[e]
+        sl = entry - side * sl_atr * a[i]
+        tp = entry + side * tp_atr * a[i]
+
+        stop = min(e + MAX_HOLD_BARS, end)
+        highs, lows = h[e:stop], l[e:stop]
+        if side == 1:
+            hit_sl, hit_tp = lows <= sl, highs >= tp
+        else:
+            hit_sl, hit_tp = highs >= sl, lows <= tp
+        first_sl = np.argmax(hit_sl) if hit_sl.any() else len(highs)
+        first_tp = np.argmax(hit_tp) if hit_tp.any() else len(highs)
+
+        if first_sl == len(highs) and first_tp == len(highs):
+            x, exit_price = stop - 1, c[stop - 1]
+        elif first_sl <= first_tp:
+            x, exit_price = e + first_sl, sl
+        else:
+            x, exit_price = e + first_tp, tp
+
+        trades.append((int(t[e]), int(t[x]), side, float((exit_price - entry) * side)))
+        next_free = x + 1
+    return trades
+
+
+def _param_sets(grid):
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def _run(series, params, start, end):
+    signal_key = next(k for k in params if k not in ("sl_atr", "tp_atr"))
+    buy, sell = series["signals"][(signal_key, params[signal_key])]
+    return simulate(series, buy, sell, start, end, params["sl_atr"], params["tp_atr"])
+
+
+def _init_worker(series):
+    global _SERIES
+    _SERIES = series
+
+
+def run_fold(fold):
+    """Optimises on the train window, then evaluates the best params on the test window."""
+    index, train, test, grid = fold
+    best_params, best_pnl, best_trades = None, -np.inf, 0
+    for params in _param_sets(grid):
+        trades = _run(_SERIES, params, *train)
+        pnl = sum(tr[3] for tr in trades)
+        if trades and pnl > best_pnl:
+            best_params, best_pnl, best_trades = params, pnl, len(trades)
+
+    test_trades = _run(_SERIES, best_params, *test) if best_params else []
+    pnl = np.array([tr[3] for tr in test_trades])
+    return {
+        "fold": index,
+        "train": [int(_SERIES["time"][train[0]]), int(_SERIES["time"][train[1] - 1])],
+        "test": [int(_SERIES["time"][test[0]]), int(_SERIES["time"][test[1] - 1])],
+        "params": best_params,
+        "train_pnl": float(best_pnl) if best_params else 0.0,
+        "train_trades": best_trades,
+        "test_pnl": float(pnl.sum()) if len(pnl) else 0.0,
+        "test_trades": len(test_trades),
+        "win_rate": float((pnl > 0).mean()) if len(pnl) else None,
+        "equity": np.cumsum(pnl).round(5).tolist(),
+        "trades": test_trades,
+    }
+
+
+def make_folds(n_bars, train_size, test_size, grid):
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_bars:
+        train = (start, start + train_size)
+        test = (start + train_size, start + train_size + test_size)
+        folds.append((len(folds), train, test, grid))
+        start += test_size
+    return folds
+
+
+def walk_forward(series, strategy, train_size, test_size, workers=None):
+    """Runs all folds in parallel and returns per-fold results plus the stitched OOS equity curve."""
+    grid = PULLBACK_GRID if strategy == "pullback" else BREAKOUT_GRID
+    folds = make_folds(len(series["close"]), train_size, test_size, grid)
+    if not folds:
+        raise ValueError("Not enough history for a single train/test fold")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(series,)) as pool:
+        results = list(pool.map(run_fold, folds))
+
+    stitched = np.cumsum([tr[3] for r in results for tr in r["trades"]])
+    logger.info(f"{len(folds)} folds in {time.perf_counter() - start:.2f}s. OOS PnL {stitched[-1] if len(stitched) else 0.0:.2f}")
+    return {
+        "strategy": strategy,
+        "folds": results,
+        "stitched_equity": stitched.round(5).tolist(),
+        "oos_pnl": float(stitched[-1]) if len(stitched) else 0.0,
+        "oos_trades": int(len(stitched)),
+    }
+
+
+def export_trades(report, symbol, contract_size, path):
+    """Writes out-of-sample trades as JSON lines (profit per 1.0 lot), e.g. for backtest.monte_carlo."""
+    with open(path, "w") as f:
+        for r in report["folds"]:
+            for entry_time, exit_time, side, pnl in r["trades"]:
+                f.write(json.dumps({
+                    "symbol": symbol,
+                    "strategy": report["strategy"],
+                    "side": "BUY" if side == 1 else "SELL",
+                    "time": exit_time,
+                    "volume": 1.0,
+                    "profit": pnl * contract_size,
+                }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward evaluation of the rule strategies")
+    parser.add_argument("--symbol", default="XAUUSD")
+    parser.add_argument("--strategy", choices=["pullback", "breakout"], default="pullback")
+    parser.add_argument("--bars", type=int, default=50000, help="M1 bars to load from MT5")
+    parser.add_argument("--csv-m1", help="Load M1 history from CSV instead of MT5")
+    parser.add_argument("--csv-m5", help="Load M5 history from CSV instead of MT5")
+    parser.add_argument("--train", type=int, default=None, help="Train window in bars of the strategy timeframe")
+    parser.add_argument("--test", type=int, default=None, help="Test window in bars of the strategy timeframe")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="Write the full report as JSON")
+    parser.add_argument("--trades-out", help="Write out-of-sample trades as JSON lines")
+    args = parser.parse_args()
+
+    if args.csv_m1 and args.csv_m5:
+        m1, m5, contract_size = load_history_csv(args.csv_m1, args.csv_m5)
+    else:
+        m1, m5, contract_size = load_history_mt5(args.symbol, args.bars)
+
+    series = precompute(m1, m5, args.strategy)
+    n = len(series["close"])
+    train = args.train or n // 6
+    test = args.test or n // 12
+    report = walk_forward(series, args.strategy, train, test, args.workers)
+
+    for r in report["folds"]:
+        logger.info(f"Fold {r['fold']}: params={r['params']} train={r['train_pnl']:.2f} test={r['test_pnl']:.2f} ({r['test_trades']} trades)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f)
+    if args.trades_out:
+        export_trades(report, args.symbol, contract_size, args.trades_out)
+        logger.info(f"OOS trades written to {os.path.abspath(args.trades_out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,13 @@ import os
 # Note: Path to terminal is usually auto-detected if not specified.
 # If you have multiple MT5 instances, specify the path to terminal64.exe
 MT5_PATH = None 
+MT5_INIT_RETRY_DELAYS = [0.5, 1.0] # Backoff between initialize() attempts (seconds)
+
+# Connection Resilience (Circuit Breaker)
+CONNECTION_FAILURE_THRESHOLD = 3   # Consecutive failed calls before the breaker opens
+RECONNECT_BACKOFF_INITIAL = 0.5    # Seconds before the 2nd reconnect attempt, doubles each time
+RECONNECT_BACKOFF_MAX = 30.0
+CONNECTION_HEARTBEAT_SECONDS = 5.0 # terminal_info() probe interval between cycles
 
 # Trading Parameters
 SYMBOLS = ["XAUUSD", "BTCUSD"] # Exact symbols as requested
@@ -21,6 +28,33 @@ MAX_OPEN_TRADES = 1 # Max 1 per symbol as requested
 STOP_LOSS = 50.0   
 TAKE_PROFIT = 80.0 
 MAGIC_NUMBER = 123456
+ORDER_DEVIATION = 20 # Max slippage in points. Tune from /execution "suggested_deviation".
+
+# Market Scanner (Large Watchlists)
+# Scans many symbols at once with numpy and only passes the best
+# candidates to the detailed RuleBasedScalper logic.
+SCANNER_ENABLED = False
+SCANNER_WATCHLIST = [] # Empty = every symbol visible in Market Watch
+SCANNER_BARS = 100     # Bars loaded per symbol (M5)
+SCANNER_TOP_K = 5      # Candidates handed to the scalper each cycle
+SCANNER_MAX_SPREAD_ATR = 0.3 # Reject symbols whose spread costs more than 30% of ATR
+
+# Cycle Deadline Budget
+# A cycle must finish before its bar closes (minus this margin).
+CYCLE_SAFETY_MARGIN_SECONDS = 5.0
+BUILD_OBSERVATIONS = False # Low-priority MarketAnalyzer feature snapshots, only built when time is left
+
+# Portfolio Analytics
+ANALYTICS_HISTORY_DAYS = 365   # Deal history loaded on the very first sync
+ANALYTICS_SNAPSHOT_SECONDS = 60
+ANALYTICS_SHARPE_WINDOW = 50   # Trades in the rolling Sharpe window
+ANALYTICS_CURVE_POINTS = 2000  # Equity curve points kept per bucket
+
+# Columnar Export (Parquet, needs pyarrow from requirements-agent.txt) of bars, signal decisions, executions and trades
+EXPORT_ENABLED = True
+EXPORT_FLUSH_SECONDS = 300 # Buffered rows are written at least this often
+EXPORT_MAX_ROWS = 10000    # ...or as soon as one partition buffers this many rows
+EXPORT_QUEUE_SIZE = 100000 # Rows beyond this are dropped, the trading thread never waits on export
 
 # Production Safety (Equity Guard)
 MAX_DAILY_DRAWDOWN_PERCENT = 10.0 # Increased to 10% to allow 5-Lot volatility.
@@ -33,5 +67,15 @@ else:
     # On Serverless/Linux, ONLY /tmp is writable
     LOG_DIR = "/tmp/logs"
 
-os.makedirs(LOG_DIR, exist_ok=True)
+# Created on first use (see ensure_log_dir) so importing config has no side effects
 LOG_FILE = os.path.join(LOG_DIR, "trading_agent.log")
+EXECUTION_LOG = os.path.join(LOG_DIR, "executions.jsonl") # One JSON record per order_send
+TRADES_FILE = os.path.join(LOG_DIR, "trades.jsonl") # Closed trades (profit, volume, time), input for backtest.monte_carlo
+PORTFOLIO_SNAPSHOT = os.path.join(LOG_DIR, "portfolio.json") # Periodic PortfolioAnalytics snapshot, served by /stats
+EXPORT_DIR = os.path.join(LOG_DIR, "export") # Parquet dataset: <kind>/date=YYYY-MM-DD/symbol=<symbol>/part-*.parquet
+RUNTIME_CONFIG_FILE = os.path.join(LOG_DIR, "runtime_config.json") # Hot-reloaded overrides (POST /config), see core.runtime_config
+HANDOVER_REQUEST = os.path.join(LOG_DIR, "handover.request") # Written by a warm standby agent, see core.handover
+HANDOVER_RELEASE = os.path.join(LOG_DIR, "handover.release") # Written by the active agent when it hands over
+
+def ensure_log_dir():
+    os.makedirs(LOG_DIR, exist_ok=True)
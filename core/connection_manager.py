@@ -0,0 +1,182 @@
+import time
+import threading
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+from config import (MT5_PATH, CONNECTION_FAILURE_THRESHOLD, RECONNECT_BACKOFF_INITIAL,
+                    RECONNECT_BACKOFF_MAX, CONNECTION_HEARTBEAT_SECONDS)
+from utils.logger import setup_logger
+
+logger = setup_logger("Connection")
+
+# MT5 IPC error codes (RES_E_INTERNAL_FAIL_*). Anything at or below this means
+# the Python <-> terminal link is broken, not that the request itself was bad.
+IPC_ERROR_THRESHOLD = -10000
+
+CLOSED = "CLOSED"       # Healthy, calls go through
+OPEN = "OPEN"           # Connection lost, calls fail fast until the next reconnect attempt
+HALF_OPEN = "HALF_OPEN" # Reconnect in progress
+
+
+class ConnectionManager:
+    """
+    Circuit breaker in front of every MetaTrader5 call.
+    - Counts consecutive connection failures (None result + IPC error / no terminal).
+    - After CONNECTION_FAILURE_THRESHOLD failures the breaker opens: calls return
+      None immediately instead of hammering a dead terminal.
+    - Reconnects with exponential backoff, then runs the registered resync
+      callbacks (symbol selection, caches) and closes the breaker.
+    """
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = RECONNECT_BACKOFF_INITIAL
+        self.next_attempt = 0.0
+        self.lost_at = None
+        self.last_heartbeat = 0.0
+        self.callbacks = []
+        self.lock = threading.RLock()
+
+        # Stats
+        self.disconnects = 0
+        self.reconnects = 0
+        self.last_recovery_ms = None
+        self.max_recovery_ms = 0.0
+
+    def on_reconnect(self, callback):
+        """Registers a callback run after every successful reconnect."""
+        self.callbacks.append(callback)
+
+    def connect(self):
+        """Single initialize attempt. Returns True on success."""
+        if mt5 is None:
+            return False
+        try:
+            connected = mt5.initialize(path=MT5_PATH) if MT5_PATH else mt5.initialize()
+        except Exception as e:
+            logger.error(f"Exception during initialize: {e}")
+            return False
+        if connected:
+            with self.lock:
+                self.state = CLOSED
+                self.failures = 0
+                self.backoff = RECONNECT_BACKOFF_INITIAL
+        return connected
+
+    def is_available(self):
+        return self.state == CLOSED
+
+    def _is_connection_error(self):
+        code = mt5.last_error()[0]
+        if code <= IPC_ERROR_THRESHOLD:
+            return True
+        return mt5.terminal_info() is None
+
+    def call(self, fn, *args, **kwargs):
+        """Runs an mt5 function through the breaker. Returns None while the breaker is open."""
+        if mt5 is None:
+            return None
+        if self.state != CLOSED and not self._try_reconnect():
+            return None
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"MT5 call {getattr(fn, '__name__', fn)} raised: {e}")
+            self._record_failure()
+            return None
+
+        if result is None and self._is_connection_error():
+            self._record_failure()
+            return None
+
+        if self.failures:
+            self.failures = 0
+        return result
+
+    def check(self, force=False):
+        """
+        Heartbeat, rate-limited to CONNECTION_HEARTBEAT_SECONDS.
+        Detects a dropped terminal between cycles instead of on the next order.
+        """
+        now = time.time()
+        if not force and now - self.last_heartbeat < CONNECTION_HEARTBEAT_SECONDS:
+            return self.is_available()
+        self.last_heartbeat = now
+        info = self.call(mt5.terminal_info) if mt5 else None
+        if info is None and self.state == CLOSED:
+            # Single failed heartbeat is enough: terminal_info never returns None while connected
+            self._open()
+            self._try_reconnect()
+        elif info is not None and not info.connected:
+            logger.warning("Terminal is running but not connected to the trade server.")
+        return self.is_available()
+
+    def _record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= CONNECTION_FAILURE_THRESHOLD:
+                self._open()
+
+    def _open(self):
+        with self.lock:
+            if self.state != CLOSED:
+                return
+            self.state = OPEN
+            self.disconnects += 1
+            self.lost_at = time.perf_counter()
+            self.next_attempt = 0.0 # First reconnect attempt right away
+            logger.error(f"Terminal connection lost (error {mt5.last_error()}). Circuit breaker OPEN.")
+
+    def _try_reconnect(self):
+        """Attempts a reconnect if the backoff has elapsed. Returns True if connected."""
+        if not self.lock.acquire(blocking=False):
+            return False # Another thread is already reconnecting
+        try:
+            if self.state == CLOSED:
+                return True
+            if time.time() < self.next_attempt:
+                return False
+
+            self.state = HALF_OPEN
+            try:
+                mt5.shutdown()
+            except Exception:
+                pass
+
+            if not self.connect():
+                self.state = OPEN
+                self.next_attempt = time.time() + self.backoff
+                logger.warning(f"Reconnect failed ({mt5.last_error()}). Next attempt in {self.backoff:.1f}s.")
+                self.backoff = min(self.backoff * 2, RECONNECT_BACKOFF_MAX)
+                return False
+        finally:
+            self.lock.release()
+
+        # Resync outside the lock: callbacks make mt5 calls (possibly from worker threads)
+        for callback in self.callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Resync callback failed: {e}")
+
+        recovery_ms = (time.perf_counter() - self.lost_at) * 1000
+        self.reconnects += 1
+        self.last_recovery_ms = recovery_ms
+        self.max_recovery_ms = max(self.max_recovery_ms, recovery_ms)
+        logger.info(f"Terminal reconnected and resynced in {recovery_ms:.0f} ms. Circuit breaker CLOSED.")
+        return True
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "disconnects": self.disconnects,
+            "reconnects": self.reconnects,
+            "last_recovery_ms": round(self.last_recovery_ms, 1) if self.last_recovery_ms is not None else None,
+            "max_recovery_ms": round(self.max_recovery_ms, 1),
+        }
+
+
+connection = ConnectionManager()
@@ -0,0 +1,102 @@
+import time
+from utils.logger import setup_logger
+
+logger = setup_logger("CycleBudget")
+
+
+class CycleBudget:
+    """
+    Per-cycle deadline accounting.
+    Each cycle belongs to the bar that is open when it starts. The deadline
+    is the close of that bar minus a safety margin; work that would run past
+    it is trading on stale data and should be skipped.
+    """
+
+    def __init__(self, interval_seconds, safety_margin=5.0, max_lateness=None):
+        self.interval = interval_seconds
+        self.safety_margin = safety_margin
+        # A cycle starting later than this into its bar opens no new entries
+        self.max_lateness = max_lateness if max_lateness is not None else interval_seconds / 2
+
+        self.bar_open = 0.0
+        self.deadline = 0.0
+        self.started = 0.0
+        self.lateness = 0.0
+        self.deferred = []
+
+        # Counters for reporting
+        self.cycles = 0
+        self.overruns = 0
+        self.late_starts = 0
+        self.skipped = 0
+        self.max_lateness_seen = 0.0
+        self.last_duration = 0.0
+
+    def start(self):
+        """Marks the beginning of a cycle and computes its deadline."""
+        now = time.time()
+        self.started = now
+        self.bar_open = now - (now % self.interval)
+        self.deadline = self.bar_open + self.interval - self.safety_margin
+        self.lateness = now - self.bar_open
+        self.deferred = []
+        self.cycles += 1
+
+        if self.lateness > self.max_lateness_seen:
+            self.max_lateness_seen = self.lateness
+        if self.is_late():
+            self.late_starts += 1
+            logger.warning(f"Cycle started {self.lateness:.1f}s into the bar (limit {self.max_lateness:.1f}s). New entries disabled.")
+
+    def remaining(self):
+        return self.deadline - time.time()
+
+    def expired(self):
+        return time.time() >= self.deadline
+
+    def is_late(self):
+        """True when the cycle started too far into the bar to open new trades."""
+        return self.lateness > self.max_lateness
+
+    def skip(self, what):
+        self.skipped += 1
+        logger.warning(f"Budget: skipped {what} ({self.remaining():.1f}s left).")
+
+    def defer(self, name, fn, *args):
+        """Queues low-priority work to run only if time is left at the end of the cycle."""
+        self.deferred.append((name, fn, args))
+
+    def run_deferred(self, min_remaining=1.0):
+        """Runs deferred work while more than min_remaining seconds are left."""
+        for name, fn, args in self.deferred:
+            if self.remaining() < min_remaining:
+                self.skip(name)
+                continue
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Deferred task {name} failed: {e}")
+        self.deferred = []
+
+    def finish(self):
+        """Closes the cycle, counts an overrun if the deadline was missed."""
+        now = time.time()
+        self.last_duration = now - self.started
+        if now > self.deadline:
+            self.overruns += 1
+            logger.warning(f"Cycle overrun: took {self.last_duration:.2f}s, {now - self.deadline:.2f}s past deadline.")
+        logger.info(
+            f"Cycle done in {self.last_duration:.2f}s (lateness {self.lateness:.2f}s). "
+            f"Overruns {self.overruns}/{self.cycles}, late starts {self.late_starts}, skipped {self.skipped}."
+        )
+
+    def stats(self):
+        return {
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "late_starts": self.late_starts,
+            "skipped": self.skipped,
+            "last_duration": round(self.last_duration, 3),
+            "last_lateness": round(self.lateness, 3),
+            "max_lateness": round(self.max_lateness_seen, 3),
+        }
@@ -0,0 +1,127 @@
+import json
+import math
+import os
+from datetime import datetime, timezone
+from config import EXECUTION_LOG, ensure_log_dir
+
+# Signal-to-fill latency and slippage analytics.
+# OrderManager appends one record per order_send to EXECUTION_LOG (JSON lines):
+#   symbol, strategy, side, retcode, ticket
+#   signal_time, send_time, return_time      (unix seconds)
+#   requested_price, filled_price, point
+# This module only uses the standard library so the API can import it
+# without pulling in pandas/numpy.
+
+
+def record_execution(record, path=EXECUTION_LOG):
+    """Appends one execution record to the journal."""
+    ensure_log_dir()
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_executions(path=EXECUTION_LOG):
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass
+    return records
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _distribution(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def slippage_points(record):
+    """
+    Signed slippage in points. Positive = adverse (paid more on a BUY,
+    received less on a SELL). None if the fill price is unknown.
+    """
+    filled = record.get("filled_price")
+    requested = record.get("requested_price")
+    point = record.get("point")
+    if not filled or not requested or not point:
+        return None
+    diff = (filled - requested) / point
+    return diff if record.get("side") == "BUY" else -diff
+
+
+def _group_key(record, group_by):
+    if group_by == "hour":
+        return datetime.fromtimestamp(record["send_time"], tz=timezone.utc).strftime("%H")
+    return record.get(group_by) or "unknown"
+
+
+def summarize_group(records):
+    filled = [r for r in records if r.get("filled")]
+    signal_to_send = [(r["send_time"] - r["signal_time"]) * 1000 for r in records if r.get("signal_time")]
+    round_trip = [(r["return_time"] - r["send_time"]) * 1000 for r in records]
+    signal_to_fill = [(r["return_time"] - r["signal_time"]) * 1000 for r in filled if r.get("signal_time")]
+    slippage = [s for s in (slippage_points(r) for r in filled) if s is not None]
+
+    return {
+        "orders": len(records),
+        "filled": len(filled),
+        "rejected": len(records) - len(filled),
+        "latency_ms": {
+            "signal_to_send": _distribution(signal_to_send),
+            "send_to_return": _distribution(round_trip),
+            "signal_to_fill": _distribution(signal_to_fill),
+        },
+        "slippage_points": _distribution(slippage),
+        "adverse_rate": round(sum(1 for s in slippage if s > 0) / len(slippage), 3) if slippage else None,
+    }
+
+
+def suggested_deviation(records, q=99, buffer=1.2):
+    """
+    Deviation (points) that would have accepted q% of historical fills,
+    with a safety buffer. None if there is no fill history.
+    """
+    slippage = sorted(abs(s) for s in (slippage_points(r) for r in records if r.get("filled")) if s is not None)
+    if not slippage:
+        return None
+    return int(math.ceil(percentile(slippage, q) * buffer)) or 1
+
+
+def execution_report(records, group_by=("symbol", "hour", "strategy")):
+    """Overall summary plus one breakdown per grouping field."""
+    report = {
+        "overall": summarize_group(records),
+        "suggested_deviation": suggested_deviation(records),
+    }
+    for field in group_by:
+        groups = {}
+        for r in records:
+            groups.setdefault(_group_key(r, field), []).append(r)
+        report[f"by_{field}"] = {key: summarize_group(rs) for key, rs in sorted(groups.items())}
+    return report
@@ -0,0 +1,216 @@
+import glob
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+from config import EXPORT_ENABLED, EXPORT_DIR, EXPORT_FLUSH_SECONDS, EXPORT_MAX_ROWS, EXPORT_QUEUE_SIZE
+from utils.logger import setup_logger
+
+logger = setup_logger("Exporter")
+
+# Columns per export kind. Time columns are passed in as unix seconds and
+# stored as UTC millisecond timestamps. Rows are partitioned by the day of
+# PARTITION_TIME[kind] and by symbol.
+if pa:
+    TS = pa.timestamp("ms", tz="UTC")
+    SCHEMAS = {
+        "bars": pa.schema([
+            ("time", TS), ("symbol", pa.string()), ("timeframe", pa.string()),
+            ("open", pa.float64()), ("high", pa.float64()), ("low", pa.float64()), ("close", pa.float64()),
+            ("tick_volume", pa.int64()), ("spread", pa.int64()),
+            ("ema_20", pa.float64()), ("ema_50", pa.float64()), ("atr", pa.float64()),
+        ]),
+        "signals": pa.schema([
+            ("time", TS), ("symbol", pa.string()), ("strategy", pa.string()),
+            ("action", pa.string()), ("accepted", pa.bool_()), ("reason", pa.string()), ("atr", pa.float64()),
+        ]),
+        "executions": pa.schema([
+            ("symbol", pa.string()), ("strategy", pa.string()), ("side", pa.string()),
+            ("retcode", pa.int64()), ("ticket", pa.int64()), ("filled", pa.bool_()),
+            ("signal_time", TS), ("send_time", TS), ("return_time", TS),
+            ("requested_price", pa.float64()), ("filled_price", pa.float64()), ("point", pa.float64()),
+        ]),
+        "trades": pa.schema([
+            ("ticket", pa.int64()), ("time", TS), ("symbol", pa.string()), ("strategy", pa.string()),
+            ("volume", pa.float64()), ("profit", pa.float64()),
+        ]),
+    }
+else:
+    SCHEMAS = {}
+
+PARTITION_TIME = {"executions": "send_time"} # Default: "time"
+
+_STOP = object()
+
+
+def _day(t):
+    return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _partition_dir(root, kind, day, symbol):
+    safe = str(symbol).replace("/", "_").replace("\\", "_")
+    return os.path.join(root, kind, f"date={day}", f"symbol={safe}")
+
+
+class Exporter:
+    """
+    Asynchronous Parquet export for offline research.
+    record() only puts the row on a bounded queue, so the trading thread
+    never does file I/O. A background thread buffers rows per
+    (kind, day, symbol) partition and writes one Parquet file per partition
+    every EXPORT_FLUSH_SECONDS (or EXPORT_MAX_ROWS). Finished days are
+    compacted into a single file per partition.
+    Disabled (with a warning) if pyarrow is not installed.
+    """
+
+    def __init__(self, root=EXPORT_DIR, enabled=EXPORT_ENABLED):
+        self.root = root
+        self.enabled = enabled and pa is not None
+        if enabled and pa is None:
+            logger.warning("pyarrow not installed. Parquet export disabled.")
+        self.queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+        self.days = set() # (kind, day) written to since the last compaction
+
+    def record(self, kind, row):
+        if not self.enabled:
+            return
+        if self.thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait((kind, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="exporter", daemon=True)
+                self.thread.start()
+
+    def close(self, timeout=30.0):
+        """Flushes everything still buffered. Called on agent shutdown."""
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def _run(self):
+        buffers = {} # (kind, day, symbol) -> [rows]
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(buffers)
+                return
+
+            if item is not None:
+                kind, row = item
+                try:
+                    key = (kind, _day(row[PARTITION_TIME.get(kind, "time")]), row["symbol"])
+                except Exception as e:
+                    logger.error(f"Export: bad {kind} row dropped: {e}")
+                    continue
+                rows = buffers.setdefault(key, [])
+                rows.append(row)
+                if len(rows) >= EXPORT_MAX_ROWS:
+                    self._write(key, buffers.pop(key))
+
+            if time.monotonic() - last_flush >= EXPORT_FLUSH_SECONDS:
+                self._flush(buffers)
+                self._compact_finished_days()
+                last_flush = time.monotonic()
+
+    def _flush(self, buffers):
+        if not buffers:
+            return
+        rows = sum(len(r) for r in buffers.values())
+        for key, batch in buffers.items():
+            self._write(key, batch)
+        buffers.clear()
+        logger.info(f"Export: {rows} rows flushed (total {self.written}, dropped {self.dropped}).")
+
+    def _write(self, key, rows):
+        kind, day, symbol = key
+        schema = SCHEMAS[kind]
+        columns = {}
+        for field in schema:
+            values = [r.get(field.name) for r in rows]
+            if field.type == TS:
+                values = [None if v is None else int(v * 1000) for v in values]
+            columns[field.name] = values
+
+        path = _partition_dir(self.root, kind, day, symbol)
+        try:
+            table = pa.table(columns, schema=schema)
+            os.makedirs(path, exist_ok=True)
+            target = os.path.join(path, f"part-{int(time.time() * 1000)}-{os.getpid()}.parquet")
+            pq.write_table(table, target + ".tmp")
+            os.replace(target + ".tmp", target) # Readers only glob *.parquet, never a partial file
+        except Exception as e:
+            logger.error(f"Export: failed to write {len(rows)} {kind} rows for {symbol} {day}: {e}")
+            return
+        self.written += len(rows)
+        self.days.add((kind, day))
+
+    def _compact_finished_days(self):
+        """Merges the part files of days before today (UTC) into one file per partition."""
+        today = _day(time.time())
+        for kind, day in [d for d in self.days if d[1] < today]:
+            self.days.discard((kind, day))
+            for path in glob.glob(_partition_dir(self.root, kind, day, "*")):
+                self._compact(path)
+
+    def _compact(self, path):
+        parts = sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+        if len(parts) < 2:
+            return
+        try:
+            table = pa.concat_tables([pq.read_table(p) for p in parts])
+            target = os.path.join(path, f"part-{int(time.time() * 1000)}-{os.getpid()}-day.parquet")
+            pq.write_table(table, target + ".tmp")
+            os.replace(target + ".tmp", target)
+            for p in parts:
+                os.remove(p)
+        except Exception as e:
+            logger.error(f"Export: compaction of {path} failed: {e}")
+
+
+def read(kind, symbols=None, start=None, end=None, root=EXPORT_DIR):
+    """
+    Loads an export kind as a pandas DataFrame for research, e.g.
+    read("signals", symbols=["XAUUSD"], start="2024-01-01").
+    Partition pruning on date/symbol means only the matching files are opened.
+    start/end are inclusive "YYYY-MM-DD" days.
+    """
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(os.path.join(root, kind), format="parquet", partitioning="hive")
+    filters = []
+    if symbols:
+        filters.append(ds.field("symbol").isin(list(symbols)))
+    if start:
+        filters.append(ds.field("date") >= start)
+    if end:
+        filters.append(ds.field("date") <= end)
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+    return dataset.to_table(filter=expression).to_pandas()
+
+
+# Shared by the scalper, OrderManager and PortfolioAnalytics
+exporter = Exporter()
@@ -0,0 +1,70 @@
+import os
+import time
+from config import HANDOVER_REQUEST, HANDOVER_RELEASE, ensure_log_dir
+
+# File-based handover between two agent processes on the same host:
+# 1. The standby (main.py --standby) connects, warms its caches and builds the
+#    agent, then calls request_takeover().
+# 2. The active agent checks takeover_requested() after every cycle. It saves
+#    its state, calls release() and exits.
+# 3. The standby returns from wait_for_release() and starts its schedule, so
+#    its first cycle is the next bar boundary: no bar is processed twice or missed.
+
+
+def _write(path, value):
+    ensure_log_dir()
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(str(value))
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def clear(paths=(HANDOVER_REQUEST, HANDOVER_RELEASE)):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def clear_request():
+    """Used by the standby after takeover. The release file stays as proof for the API."""
+    clear((HANDOVER_REQUEST,))
+
+
+def request_takeover(pid):
+    _write(HANDOVER_REQUEST, pid)
+
+
+def takeover_requested():
+    """Returns the standby's pid if a takeover was requested, else None."""
+    pid = _read(HANDOVER_REQUEST)
+    return int(pid) if pid else None
+
+
+def release():
+    """Signals the standby that this agent has stopped trading (epoch seconds)."""
+    _write(HANDOVER_RELEASE, repr(time.time()))
+
+
+def released():
+    return _read(HANDOVER_RELEASE) is not None
+
+
+def wait_for_release(timeout, poll=0.005):
+    """Blocks until the active agent releases. Returns the release time, or None on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        released_at = _read(HANDOVER_RELEASE)
+        if released_at:
+            return float(released_at)
+        time.sleep(poll)
+    return None
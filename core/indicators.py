@@ -0,0 +1,98 @@
+import numpy as np
+
+# Vectorized indicator kernels.
+# Every function works along the last axis, so a 1-D series (one symbol)
+# and a 2-D matrix (symbols x bars) go through the same code path.
+# Formulas match the pandas versions used in RuleBasedScalper / MarketAnalyzer:
+#   EMA  -> ewm(span, adjust=False)
+#   ATR  -> rolling(14).mean() of the true range
+#   RSI  -> rolling(14).mean() of gains / losses
+
+
+def ema(values, span):
+    """Exponential moving average (adjust=False) along the last axis."""
+    values = np.asarray(values, dtype=np.float64)
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(values)
+    out[..., 0] = values[..., 0]
+    # Loop over time only; every step is vectorized across symbols.
+    for i in range(1, values.shape[-1]):
+        out[..., i] = alpha * values[..., i] + (1.0 - alpha) * out[..., i - 1]
+    return out
+
+
+def rolling_mean(values, window):
+    """Simple rolling mean along the last axis. First window-1 values are NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if values.shape[-1] < window:
+        return out
+    csum = np.cumsum(values, axis=-1)
+    out[..., window - 1] = csum[..., window - 1]
+    out[..., window:] = csum[..., window:] - csum[..., :-window]
+    out[..., window - 1:] /= window
+    return out
+
+
+def rolling_std(values, window):
+    """Rolling sample std (ddof=1, like pandas) along the last axis. First window-1 values are NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if values.shape[-1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+    out[..., window - 1:] = windows.std(axis=-1, ddof=1)
+    return out
+
+
+def rolling_max(values, window):
+    """Rolling max along the last axis. First window-1 values are NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if values.shape[-1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+    out[..., window - 1:] = windows.max(axis=-1)
+    return out
+
+
+def rolling_min(values, window):
+    """Rolling min along the last axis. First window-1 values are NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if values.shape[-1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+    out[..., window - 1:] = windows.min(axis=-1)
+    return out
+
+
+def true_range(high, low, close):
+    """True range along the last axis. The first bar uses high - low only."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    prev_close = close[..., :-1]
+    tr[..., 1:] = np.maximum(
+        tr[..., 1:],
+        np.maximum(np.abs(high[..., 1:] - prev_close), np.abs(low[..., 1:] - prev_close)),
+    )
+    return tr
+
+
+def atr(high, low, close, period=14):
+    """Average True Range (simple rolling mean, same as the pandas version)."""
+    return rolling_mean(true_range(high, low, close), period)
+
+
+def rsi(close, period=14):
+    """RSI using simple rolling means of gains and losses."""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.zeros_like(close)
+    delta[..., 1:] = np.diff(close, axis=-1)
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gain / loss
+        return 100.0 - (100.0 / (1.0 + rs))
@@ -1,9 +1,10 @@
-import pandas as pd
 try:
     import MetaTrader5 as mt5
 except ImportError:
     mt5 = None
-from core.mt5_interface import get_ohlc_data, get_symbol_info_tick, get_open_positions
+from core.mt5_interface import load_bar_matrix
+from core.models import MarketState
+from core.indicators import ema, atr, rsi, rolling_mean, rolling_std
 from config import TIMEFRAME_MINUTES
 from utils.logger import setup_logger
 
@@ -16,111 +17,99 @@ TIMEFRAME_MAP = {
     5: mt5.TIMEFRAME_M5,
     15: mt5.TIMEFRAME_M15,
     60: mt5.TIMEFRAME_H1
-}
+} if mt5 else {}
 
-class MarketAnalyzer:
-    def __init__(self, symbol):
+# Timeframes analysed for every symbol
+ANALYSIS_TIMEFRAMES = (
+    ("M1", mt5.TIMEFRAME_M1),
+    ("M5", mt5.TIMEFRAME_M5),
+    ("M15", mt5.TIMEFRAME_M15),
+) if mt5 else ()
+
+ANALYSIS_BARS = 100
+
+
+class TimeframeFeatures:
+    """Indicator values of the last closed bar of one timeframe."""
+    __slots__ = ("close", "rsi", "ema_9", "ema_20", "ema_50", "bb_upper", "bb_lower", "atr")
+
+    def __init__(self, close, rsi, ema_9, ema_20, ema_50, bb_upper, bb_lower, atr):
+        self.close = close
+        self.rsi = rsi
+        self.ema_9 = ema_9
+        self.ema_20 = ema_20
+        self.ema_50 = ema_50
+        self.bb_upper = bb_upper
+        self.bb_lower = bb_lower
+        self.atr = atr
+
+
+class MarketFeatures:
+    """
+    Numeric market snapshot of one symbol. The text observation is only
+    rendered when `.observation` is read, and then cached.
+    Supports the old dict keys (data["atr"], data["observation"], ...).
+    """
+    __slots__ = ("symbol", "current_price", "spread", "timeframes", "open_positions", "_observation")
+
+    def __init__(self, symbol, current_price, spread, timeframes, open_positions):
         self.symbol = symbol
-        self.mt5_timeframe = TIMEFRAME_MAP.get(TIMEFRAME_MINUTES, mt5.TIMEFRAME_M5)
+        self.current_price = current_price
+        self.spread = spread
+        self.timeframes = timeframes # {"M1": TimeframeFeatures, ...}, missing timeframes are absent
+        self.open_positions = open_positions
+        self._observation = None
 
-    def get_market_data(self):
-        """
-        Fetches data for M1, M5, M15 and calculates indicators.
-        Returns a rich dictionary summary.
-        """
-        # Timeframes to fetch
-        tfs = {
-            "M1": mt5.TIMEFRAME_M1,
-            "M5": mt5.TIMEFRAME_M5,
-            "M15": mt5.TIMEFRAME_M15
-        }
-        
-        data = {}
-        analysis_str = ""
-        last_atr_m1 = 0.0
-
-        for tf_name, tf_const in tfs.items():
-            df = get_ohlc_data(self.symbol, tf_const, n=100)
-            if df is None:
-                continue
-                
-            # Calc Indicators
-            df['EMA_9'] = df['close'].ewm(span=9, adjust=False).mean()
-            df['EMA_20'] = df['close'].ewm(span=20, adjust=False).mean()
-            df['EMA_50'] = df['close'].ewm(span=50, adjust=False).mean()
-            
-            # ATR
-            high_low = df['high'] - df['low']
-            high_close = (df['high'] - df['close'].shift()).abs()
-            low_close = (df['low'] - df['close'].shift()).abs()
-            ranges = pd.concat([high_low, high_close, low_close], axis=1)
-            true_range = ranges.max(axis=1)
-            true_range = ranges.max(axis=1)
-            df['ATR'] = true_range.rolling(14).mean()
-            
-            # RSI (14)
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-            rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
-            
-            # Bollinger Bands (20, 2)
-            # BB_MID = EMA20 (or SMA20? Standard is SMA20) -> Using SMA20 for standard BB
-            sma20 = df['close'].rolling(20).mean()
-            std20 = df['close'].rolling(20).std()
-            df['BB_UPPER'] = sma20 + (2.0 * std20)
-            df['BB_LOWER'] = sma20 - (2.0 * std20)
-            # Use SMA20 as Mid line
-            
-            latest = df.iloc[-1]
-            prev = df.iloc[-2]
-            
-            if tf_name == "M1":
-                last_atr_m1 = prev['ATR']
-                last_rsi_m1 = prev['RSI']
-
-            # Analyze Trend
-            p_vs_e20 = "Above" if prev['close'] > prev['EMA_20'] else "Below"
-            e20_vs_e50 = "Bullish" if prev['EMA_20'] > prev['EMA_50'] else "Bearish"
-            
-            # Analyze Range
-            bb_width = prev['BB_UPPER'] - prev['BB_LOWER']
-            in_range = "Inside" if prev['BB_LOWER'] < prev['close'] < prev['BB_UPPER'] else "Breakout"
+    @property
+    def atr(self):
+        """M1 ATR (used for scalping stops), None if M1 data was unavailable."""
+        m1 = self.timeframes.get("M1")
+        return m1.atr if m1 else None
 
+    @property
+    def rsi(self):
+        m1 = self.timeframes.get("M1")
+        return m1.rsi if m1 else None
+
+    @property
+    def observation(self):
+        if self._observation is None:
+            self._observation = self.render()
+        return self._observation
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def render(self):
+        """Textual multi-timeframe observation (same layout as before)."""
+        analysis_str = ""
+        for tf_name, f in self.timeframes.items():
+            p_vs_e20 = "Above" if f.close > f.ema_20 else "Below"
+            e20_vs_e50 = "Bullish" if f.ema_20 > f.ema_50 else "Bearish"
+            bb_width = f.bb_upper - f.bb_lower
+            in_range = "Inside" if f.bb_lower < f.close < f.bb_upper else "Breakout"
             analysis_str += f"""
 [{tf_name} Data]
-Close: {prev['close']}
-RSI: {prev['RSI']:.2f}
-EMA9: {prev['EMA_9']:.2f} | EMA20: {prev['EMA_20']:.2f} | EMA50: {prev['EMA_50']:.2f}
-BB: Upper={prev['BB_UPPER']:.2f} | Lower={prev['BB_LOWER']:.2f} | Width={bb_width:.2f}
+Close: {f.close}
+RSI: {f.rsi:.2f}
+EMA9: {f.ema_9:.2f} | EMA20: {f.ema_20:.2f} | EMA50: {f.ema_50:.2f}
+BB: Upper={f.bb_upper:.2f} | Lower={f.bb_lower:.2f} | Width={bb_width:.2f}
 Trend: {p_vs_e20} EMA20, Structure: {e20_vs_e50}
 Range Status: {in_range}
 """
 
-        tick = get_symbol_info_tick(self.symbol)
-        if tick is None:
-            return None
-            
-        current_price = tick.ask
-        spread = tick.ask - tick.bid
-
-        # Check existing positions
-        positions = get_open_positions(self.symbol)
         position_summary = "No open positions."
-        pnl_info = ""
-        if positions:
+        if self.open_positions:
             pos_details = []
-            for p in positions:
-                type_str = "BUY" if p.type == mt5.ORDER_TYPE_BUY else "SELL"
+            for p in self.open_positions:
+                type_str = "BUY" if p.is_buy else "SELL"
                 pos_details.append(f"{type_str} @ {p.price_open} (PnL: {p.profit:.2f})")
             position_summary = "Open Positions:\n" + "\n".join(pos_details)
-            
-        # Construct Textual Observation
+
         observation = f"""
 Instrument: {self.symbol}
-Current Price: {current_price}
-Spread: {spread:.5f}
+Current Price: {self.current_price}
+Spread: {self.spread:.5f}
 
 --- MULTI-TIMEFRAME ANALYSIS ---
 {analysis_str}
@@ -129,11 +118,73 @@ Spread: {spread:.5f}
 Account/Position Status:
 {position_summary}
 """
-        return {
-            "observation": observation.strip(),
-            "atr": last_atr_m1, # Use M1 ATR for scalping stops
-            "rsi": last_rsi_m1,
-            "current_price": current_price,
-            "open_positions": positions
-        }
+        return observation.strip()
+
+
+def _timeframe_features(high, low, close):
+    """
+    Indicators for a (symbols x bars) batch, evaluated on the last closed
+    bar (column -2). Returns one TimeframeFeatures per row.
+    """
+    sma20 = rolling_mean(close, 20)[:, -2]
+    std20 = rolling_std(close, 20)[:, -2]
+    columns = (
+        close[:, -2],
+        rsi(close, 14)[:, -2],
+        ema(close, 9)[:, -2],
+        ema(close, 20)[:, -2],
+        ema(close, 50)[:, -2],
+        sma20 + 2.0 * std20,
+        sma20 - 2.0 * std20,
+        atr(high, low, close, 14)[:, -2],
+    )
+    # tolist() converts to Python floats in one call instead of per element
+    return [TimeframeFeatures(*row) for row in zip(*(c.tolist() for c in columns))]
+
+
+def build_features(symbols, market, n=ANALYSIS_BARS):
+    """
+    Batch API: builds MarketFeatures for all symbols at once. Each timeframe
+    is loaded into one (symbols x bars) array and its indicators computed in
+    a single vectorized pass. Symbols without a tick are left out.
+    Returns {symbol: MarketFeatures}.
+    """
+    per_symbol = {s: {} for s in symbols}
+    for tf_name, tf_const in ANALYSIS_TIMEFRAMES:
+        loaded, bars = load_bar_matrix(symbols, tf_const, n, ("high", "low", "close"))
+        if not loaded:
+            continue
+        for symbol, f in zip(loaded, _timeframe_features(bars["high"], bars["low"], bars["close"])):
+            per_symbol[symbol][tf_name] = f
+
+    features = {}
+    for symbol in symbols:
+        tick = market.tick(symbol)
+        if tick is None:
+            continue
+        if "M1" not in per_symbol[symbol]:
+            logger.warning(f"{symbol}: M1 data unavailable, ATR/RSI will be None.")
+        features[symbol] = MarketFeatures(
+            symbol, tick.ask, tick.spread, per_symbol[symbol],
+            list(market.positions.for_symbol(symbol)),
+        )
+    return features
+
+
+class MarketAnalyzer:
+    def __init__(self, symbol, market=None):
+        self.symbol = symbol
+        # Standalone use gets a private model that syncs this symbol's positions itself
+        self.owns_market = market is None
+        self.market = market or MarketState()
+        self.mt5_timeframe = TIMEFRAME_MAP.get(TIMEFRAME_MINUTES, mt5.TIMEFRAME_M5) if mt5 else None
 
+    def get_market_data(self):
+        """
+        Fetches M1, M5, M15 data and calculates indicators.
+        Returns a MarketFeatures record (numeric; text observation rendered on demand),
+        or None if no tick is available. For many symbols use build_features().
+        """
+        if self.owns_market:
+            self.market.sync_positions(self.symbol)
+        return build_features([self.symbol], self.market).get(self.symbol)
@@ -0,0 +1,148 @@
+import time
+import numpy as np
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+from core.mt5_interface import load_bar_matrix, get_symbol_info, select_symbol
+from core.indicators import ema, atr, rolling_max, rolling_min
+from config import SCANNER_BARS, SCANNER_TOP_K, SCANNER_MAX_SPREAD_ATR
+from utils.logger import setup_logger
+
+logger = setup_logger("MarketScanner")
+
+BREAKOUT_LOOKBACK = 20
+
+
+class MarketScanner:
+    """
+    Cross-symbol scanner for large watchlists.
+    Loads the last N M5 bars of every symbol into 2-D arrays (symbols x bars)
+    and scores all of them in one pass. Only the top-K symbols are handed
+    to the detailed RuleBasedScalper logic.
+    """
+
+    def __init__(self, symbols, n_bars=SCANNER_BARS, top_k=SCANNER_TOP_K):
+        self.symbols = list(symbols)
+        self.n_bars = n_bars
+        self.top_k = top_k
+        self.points = {} # symbol -> point size (static, cached once)
+        self.last_scan = None
+
+        for symbol in self.symbols:
+            select_symbol(symbol)
+
+    def _point(self, symbol):
+        point = self.points.get(symbol)
+        if point is None:
+            info = get_symbol_info(symbol)
+            if info is None:
+                return None
+            point = info.point
+            self.points[symbol] = point
+        return point
+
+    def load_bars(self):
+        """
+        Returns (symbols, open, high, low, close, spread) where every price
+        array has shape (n_symbols, n_bars). Spread is converted from points
+        to price. Symbols without a full window of bars are dropped.
+        """
+        symbols, bars = load_bar_matrix(self.symbols, mt5.TIMEFRAME_M5, self.n_bars,
+                                        ("open", "high", "low", "close", "spread"))
+        points = np.array([self._point(s) or np.nan for s in symbols])
+        keep = ~np.isnan(points)
+        if not keep.all():
+            symbols = [s for s, k in zip(symbols, keep) if k]
+            bars = {f: m[keep] for f, m in bars.items()}
+            points = points[keep]
+        spread = bars["spread"] * points[:, None]
+        return (symbols, bars["open"], bars["high"], bars["low"], bars["close"], spread)
+
+    def compute_features(self, high, low, close, spread):
+        """
+        Computes per-symbol features on the last closed bar (column -2).
+        All inputs are (n_symbols, n_bars) arrays; every output is 1-D.
+        - bias: +1 bullish / -1 bearish / 0 neutral (same rule as check_signals)
+        - trend: |EMA20 - EMA50| in ATR units
+        - volatility: ATR / close
+        - spread_cost: current spread in ATR units
+        - breakout_dist: distance to the nearest 20-bar extreme in ATR units
+        """
+        ema_20 = ema(close, 20)[:, -2]
+        ema_50 = ema(close, 50)[:, -2]
+        atr_14 = atr(high, low, close, 14)[:, -2]
+        last_close = close[:, -2]
+
+        bias = np.zeros(len(close), dtype=np.int8)
+        bias[(ema_20 > ema_50) & (last_close > ema_20)] = 1
+        bias[(ema_20 < ema_50) & (last_close < ema_20)] = -1
+
+        # Range of the 20 bars before the last closed one
+        range_high = rolling_max(high, BREAKOUT_LOOKBACK)[:, -3]
+        range_low = rolling_min(low, BREAKOUT_LOOKBACK)[:, -3]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            trend = np.abs(ema_20 - ema_50) / atr_14
+            volatility = atr_14 / last_close
+            spread_cost = spread[:, -1] / atr_14
+            breakout_dist = np.minimum(range_high - last_close, last_close - range_low) / atr_14
+
+        return {
+            "bias": bias,
+            "trend": trend,
+            "volatility": volatility,
+            "spread_cost": spread_cost,
+            "breakout_dist": np.maximum(breakout_dist, 0.0),
+            "atr": atr_14,
+        }
+
+    def score(self, features):
+        """
+        Higher is better. Trending symbols (non-neutral bias) and symbols
+        sitting close to a 20-bar extreme score up, spread cost scores down.
+        Dead or too-expensive symbols get -inf.
+        """
+        trend = np.clip(features["trend"], 0.0, 3.0) * (features["bias"] != 0)
+        breakout = 1.0 / (1.0 + features["breakout_dist"])
+        scores = trend + breakout - features["spread_cost"]
+
+        invalid = (
+            ~np.isfinite(scores)
+            | ~(features["atr"] > 0)
+            | (features["spread_cost"] > SCANNER_MAX_SPREAD_ATR)
+        )
+        scores[invalid] = -np.inf
+        return scores
+
+    def scan(self):
+        """Runs a full scan and returns the top-K symbol names, best first."""
+        start = time.perf_counter()
+        symbols, _, high, low, close, spread = self.load_bars()
+        loaded = time.perf_counter()
+
+        if not symbols:
+            logger.warning("Scanner: no symbol data available.")
+            return []
+
+        features = self.compute_features(high, low, close, spread)
+        scores = self.score(features)
+
+        k = min(self.top_k, len(symbols))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        candidates = [symbols[i] for i in top if np.isfinite(scores[i])]
+
+        done = time.perf_counter()
+        self.last_scan = {
+            "symbols": symbols,
+            "scores": scores,
+            "features": features,
+            "candidates": candidates,
+        }
+        logger.info(
+            f"Scanner: {len(symbols)}/{len(self.symbols)} symbols in {(done - start) * 1000:.0f} ms "
+            f"(load {(loaded - start) * 1000:.0f} ms, compute {(done - loaded) * 1000:.0f} ms). "
+            f"Top {k}: {candidates}"
+        )
+        return candidates
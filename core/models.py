@@ -0,0 +1,171 @@
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+from core.mt5_interface import fetch_positions, get_symbol_info, get_symbol_info_tick
+
+# Compact in-process market model.
+# Slotted records are updated in place from the MT5 named tuples, so a cycle
+# doesn't allocate new objects/dicts per lookup and position queries are O(1)
+# dict hits instead of a positions_get() round trip per symbol.
+
+
+class Tick:
+    __slots__ = ("symbol", "bid", "ask", "time_msc")
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bid = 0.0
+        self.ask = 0.0
+        self.time_msc = 0
+
+    def update(self, raw):
+        self.bid = raw.bid
+        self.ask = raw.ask
+        self.time_msc = raw.time_msc
+
+    @property
+    def spread(self):
+        return self.ask - self.bid
+
+
+class SymbolSpec:
+    """Static contract data. Loaded once per symbol (and again after a reconnect)."""
+    __slots__ = ("name", "point", "digits", "contract_size", "volume_min", "volume_step")
+
+    def __init__(self, raw):
+        self.name = raw.name
+        self.point = raw.point
+        self.digits = raw.digits
+        self.contract_size = raw.trade_contract_size
+        self.volume_min = raw.volume_min
+        self.volume_step = raw.volume_step
+
+
+class Position:
+    __slots__ = ("ticket", "symbol", "is_buy", "volume", "price_open", "sl", "tp", "profit", "magic")
+
+    def __init__(self, raw):
+        self.ticket = raw.ticket
+        self.symbol = raw.symbol
+        self.is_buy = raw.type == mt5.ORDER_TYPE_BUY
+        self.magic = raw.magic
+        self.price_open = raw.price_open
+        self.update(raw)
+
+    def update(self, raw):
+        """Refreshes the mutable fields (partial closes, SL/TP moves, floating PnL)."""
+        self.volume = raw.volume
+        self.sl = raw.sl
+        self.tp = raw.tp
+        self.profit = raw.profit
+
+    @property
+    def type(self):
+        """MT5 order type, for code written against the raw TradePosition."""
+        return mt5.ORDER_TYPE_BUY if self.is_buy else mt5.ORDER_TYPE_SELL
+
+
+class PositionBook:
+    """Open positions indexed by ticket and by symbol, kept current from positions_get diffs."""
+
+    def __init__(self):
+        self.by_ticket = {}
+        self.by_symbol = {} # symbol -> {ticket: Position}
+
+    def sync(self, raw_positions, symbol=None):
+        """
+        Applies a positions_get result. Existing positions are updated in place,
+        new ones added, missing ones removed. With `symbol`, only that symbol's
+        positions are considered for removal (result of positions_get(symbol=...)).
+        Returns (added, removed) ticket counts.
+        """
+        seen = set()
+        added = 0
+        for raw in raw_positions:
+            seen.add(raw.ticket)
+            pos = self.by_ticket.get(raw.ticket)
+            if pos is None:
+                pos = Position(raw)
+                self.by_ticket[pos.ticket] = pos
+                self.by_symbol.setdefault(pos.symbol, {})[pos.ticket] = pos
+                added += 1
+            else:
+                pos.update(raw)
+
+        scope = self.by_symbol.get(symbol, {}) if symbol else self.by_ticket
+        gone = [ticket for ticket in scope if ticket not in seen]
+        for ticket in gone:
+            self._remove(ticket)
+        return added, len(gone)
+
+    def _remove(self, ticket):
+        pos = self.by_ticket.pop(ticket)
+        bucket = self.by_symbol[pos.symbol]
+        del bucket[ticket]
+        if not bucket:
+            del self.by_symbol[pos.symbol]
+
+    def get(self, ticket):
+        return self.by_ticket.get(ticket)
+
+    def for_symbol(self, symbol):
+        bucket = self.by_symbol.get(symbol)
+        return bucket.values() if bucket else ()
+
+    def count(self, symbol):
+        bucket = self.by_symbol.get(symbol)
+        return len(bucket) if bucket else 0
+
+    def symbols(self):
+        return self.by_symbol.keys()
+
+    def clear(self):
+        self.by_ticket.clear()
+        self.by_symbol.clear()
+
+
+class MarketState:
+    """Positions, last ticks and symbol specs shared by the scalper, OrderManager and MarketAnalyzer."""
+
+    def __init__(self):
+        self.positions = PositionBook()
+        self.ticks = {}
+        self.specs = {}
+
+    def sync_positions(self, symbol=None):
+        """
+        One positions_get call for all symbols (or one symbol after an order).
+        A failed call leaves the book untouched rather than emptying it.
+        """
+        raw = fetch_positions(symbol)
+        if raw is None:
+            return 0, 0
+        return self.positions.sync(raw, symbol)
+
+    def tick(self, symbol):
+        """Refreshes and returns the symbol's Tick record, or None if unavailable."""
+        raw = get_symbol_info_tick(symbol)
+        if raw is None:
+            return None
+        tick = self.ticks.get(symbol)
+        if tick is None:
+            tick = self.ticks[symbol] = Tick(symbol)
+        tick.update(raw)
+        return tick
+
+    def spec(self, symbol):
+        spec = self.specs.get(symbol)
+        if spec is None:
+            raw = get_symbol_info(symbol)
+            if raw is None:
+                return None
+            spec = self.specs[symbol] = SymbolSpec(raw)
+        return spec
+
+    def invalidate(self):
+        """Drops everything cached; used after a terminal reconnect."""
+        self.positions.clear()
+        self.ticks.clear()
+        self.specs.clear()
+        self.sync_positions()
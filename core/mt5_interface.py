@@ -3,10 +3,11 @@ try:
 except ImportError:
     mt5 = None
 
-import pandas as pd
+import time
 from datetime import datetime
 from utils.logger import setup_logger
-from config import MT5_PATH
+from config import MT5_INIT_RETRY_DELAYS
+from core.connection_manager import connection
 
 logger = setup_logger("MT5Interface")
 
@@ -16,19 +17,16 @@ def initialize_mt5():
         logger.error("MetaTrader5 library not found (Linux/Vercel Environment). Trading Disabled.")
         return False
 
-    for i in range(3):
-        try:
-            connected = mt5.initialize(path=MT5_PATH) if MT5_PATH else mt5.initialize()
-            if connected:
-                logger.info(f"MetaTrader5 package version: {mt5.__version__}")
-                logger.info(f"Terminal connected: {mt5.terminal_info().name}")
-                return True
-            else:
-                logger.warning(f"initialize() attempt {i+1} failed, error code = {mt5.last_error()}")
-                import time
-                time.sleep(2)
-        except Exception as e:
-            logger.error(f"Exception during initialize: {e}")
+    # First attempt immediately, then a short backoff between retries
+    delays = [0.0] + list(MT5_INIT_RETRY_DELAYS)
+    for i, delay in enumerate(delays):
+        if delay:
+            time.sleep(delay)
+        if connection.connect():
+            logger.info(f"MetaTrader5 package version: {mt5.__version__}")
+            logger.info(f"Terminal connected: {mt5.terminal_info().name}")
+            return True
+        logger.warning(f"initialize() attempt {i+1} failed, error code = {mt5.last_error()}")
             
     logger.error("All initialize attempts failed.")
     return False
@@ -41,7 +39,7 @@ def shutdown_mt5():
 def get_symbol_info_tick(symbol):
     """Gets the last tick for a symbol (Bid/Ask)."""
     if mt5 is None: return None
-    tick = mt5.symbol_info_tick(symbol)
+    tick = connection.call(mt5.symbol_info_tick, symbol)
     if tick is None:
         logger.error(f"{symbol} not found, can not call symbol_info_tick()")
         return None
@@ -53,27 +51,126 @@ def get_ohlc_data(symbol, timeframe, n=100):
     timeframe: e.g., mt5.TIMEFRAME_M5
     """
     if mt5 is None: return None
-    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, n)
+    rates = connection.call(mt5.copy_rates_from_pos, symbol, timeframe, 0, n)
     if rates is None or len(rates) == 0:
         logger.error(f"Failed to get rates for {symbol}")
         return None
     
+    import pandas as pd # Lazy: keeps pandas off the startup path
     df = pd.DataFrame(rates)
     df['time'] = pd.to_datetime(df['time'], unit='s')
     return df
 
+def fetch_positions(symbol=None):
+    """Raw positions_get result: a tuple, or None if the call failed (unlike get_open_positions)."""
+    if mt5 is None: return None
+    if symbol:
+        return connection.call(mt5.positions_get, symbol=symbol)
+    return connection.call(mt5.positions_get)
+
 def get_open_positions(symbol=None):
     """Returns list of open positions, optionally filtered by symbol."""
-    if mt5 is None: return []
-    if symbol:
-        positions = mt5.positions_get(symbol=symbol)
-    else:
-        positions = mt5.positions_get()
-        
+    positions = fetch_positions(symbol)
     if positions is None:
         return []
     return list(positions)
 
+def send_order(request):
+    """Sends a trade request. Returns None if the terminal is unreachable."""
+    if mt5 is None: return None
+    return connection.call(mt5.order_send, request)
+
+def get_last_error():
+    if mt5 is None: return None
+    return mt5.last_error()
+
 def get_account_info():
     if mt5 is None: return None
-    return mt5.account_info()
+    return connection.call(mt5.account_info)
+
+def get_rates_array(symbol, timeframe, n=100):
+    """
+    Fetches the last n candles as the raw numpy structured array
+    (fields: time, open, high, low, close, tick_volume, spread, real_volume).
+    Skips the DataFrame conversion; used by the vectorized scanner.
+    """
+    if mt5 is None: return None
+    rates = connection.call(mt5.copy_rates_from_pos, symbol, timeframe, 0, n)
+    if rates is None or len(rates) == 0:
+        return None
+    return rates
+
+def load_bar_matrix(symbols, timeframe, n, fields=("open", "high", "low", "close")):
+    """
+    Loads the last n bars of many symbols into 2-D arrays (symbols x bars),
+    one per field. Symbols without a full window of n bars are dropped.
+    Returns (loaded_symbols, {field: array}).
+    """
+    import numpy as np # Lazy: keeps numpy off the startup path
+    matrices = {f: np.empty((len(symbols), n)) for f in fields}
+    loaded = []
+    for symbol in symbols:
+        rates = get_rates_array(symbol, timeframe, n)
+        if rates is None or len(rates) < n:
+            continue
+        row = len(loaded)
+        for f in fields:
+            matrices[f][row] = rates[f]
+        loaded.append(symbol)
+    return loaded, {f: m[:len(loaded)] for f, m in matrices.items()}
+
+def get_symbol_info(symbol):
+    if mt5 is None: return None
+    return connection.call(mt5.symbol_info, symbol)
+
+def get_market_watch_symbols():
+    """Returns the names of all symbols visible in the Market Watch window."""
+    if mt5 is None: return []
+    symbols = connection.call(mt5.symbols_get)
+    if symbols is None:
+        return []
+    return [s.name for s in symbols if s.visible]
+
+def select_symbol(symbol):
+    """Adds the symbol to Market Watch so rates/ticks can be requested."""
+    if mt5 is None: return False
+    return bool(connection.call(mt5.symbol_select, symbol, True))
+
+def get_deal(ticket):
+    """Returns a single deal from the terminal's history by ticket, or None."""
+    if mt5 is None or not ticket: return None
+    deals = connection.call(mt5.history_deals_get, ticket=ticket)
+    if not deals:
+        return None
+    return deals[0]
+
+def warm_up(symbols, timeframes, n=100):
+    """
+    Selects every symbol and pre-loads its bars and tick so the terminal's
+    history caches are hot before the first cycle.
+    Calls are made one at a time: the MetaTrader5 package talks to the
+    terminal over a single IPC channel and is not documented as thread-safe.
+    Returns the symbols that warmed up successfully.
+    """
+    if mt5 is None: return []
+
+    warmed = []
+    for symbol in symbols:
+        if not select_symbol(symbol):
+            continue
+        for tf in timeframes:
+            connection.call(mt5.copy_rates_from_pos, symbol, tf, 0, n)
+        connection.call(mt5.symbol_info_tick, symbol)
+        warmed.append(symbol)
+
+    if len(warmed) < len(symbols):
+        logger.warning(f"Warm-up failed for: {sorted(set(symbols) - set(warmed))}")
+    return warmed
+
+def get_deals(date_from, date_to):
+    """Returns deals from the terminal's history in [date_from, date_to] (datetimes)."""
+    if mt5 is None: return []
+    deals = connection.call(mt5.history_deals_get, date_from, date_to)
+    if deals is None:
+        return []
+    return list(deals)
@@ -3,30 +3,44 @@ try:
 except ImportError:
     mt5 = None
 
-from config import STOP_LOSS, TAKE_PROFIT, MAGIC_NUMBER, SYMBOLS, MAX_OPEN_TRADES
-from core.mt5_interface import get_symbol_info_tick, get_open_positions
+import time
+import config # Reloadable settings (see core.runtime_config) are read as config.X at use time
+from config import MAGIC_NUMBER, SYMBOLS
+from core.mt5_interface import get_deal, send_order, get_account_info, get_last_error
+from core.models import MarketState
+from core.execution_analytics import record_execution
+from core.exporter import exporter
 from utils.logger import setup_logger
 
 logger = setup_logger("OrderManager")
 
+# order_send retcodes that produced a deal (a partial fill is still a position)
+FILLED_RETCODES = (mt5.TRADE_RETCODE_DONE, mt5.TRADE_RETCODE_DONE_PARTIAL) if mt5 else ()
+
 class OrderManager:
-    def __init__(self):
-        pass
+    def __init__(self, market=None):
+        # Shared position/tick/spec model; the scalper syncs positions once per cycle
+        self.market = market or MarketState()
+        # Cleared by the scalper for late cycles: signals on a stale bar must not open trades
+        self.allow_entries = True
+        # Reused SL/TP modification request (mutated per call instead of rebuilt)
+        self._sltp_request = {"action": mt5.TRADE_ACTION_SLTP, "magic": MAGIC_NUMBER} if mt5 else None
 
     def can_trade(self, symbol):
         """Checks if we are allowed to open a new trade for this symbol."""
-        positions = get_open_positions(symbol)
-        if len(positions) >= MAX_OPEN_TRADES:
-            logger.info(f"Max trades ({MAX_OPEN_TRADES}) reached for {symbol}. Cannot open new.")
+        if self.market.positions.count(symbol) >= config.MAX_OPEN_TRADES:
+            logger.info(f"Max trades ({config.MAX_OPEN_TRADES}) reached for {symbol}. Cannot open new.")
             return False
         return True
 
-    def execute_action(self, symbol, action_type, atr=None, confidence=0.0):
+    def execute_action(self, symbol, action_type, atr=None, confidence=0.0, strategy="manual", signal_time=None):
         """
         Executes an action: BUY, SELL, CLOSE, HOLD.
         action_type: str "BUY", "SELL", "CLOSE", "HOLD"
         atr: float (optional) - used for dynamic stops
         confidence: float (optional) - used for position sizing
+        strategy: str (optional) - tag recorded in the execution journal
+        signal_time: float (optional) - unix time the signal was detected
         """
         action_type = action_type.upper()
         
@@ -37,21 +51,25 @@ class OrderManager:
             return self.close_all_positions(symbol)
 
         if action_type in ["BUY", "SELL"]:
+            if not self.allow_entries:
+                logger.info(f"{symbol}: {action_type} suppressed, new entries disabled for this cycle.")
+                return False, "Entries disabled (late cycle)."
             if not self.can_trade(symbol):
                 return False, "Max trades reached."
-            return self.place_market_order(symbol, action_type, atr, confidence)
+            return self.place_market_order(symbol, action_type, atr, confidence, strategy, signal_time)
             
         logger.warning(f"Unknown action: {action_type}")
         return False, "Unknown action."
 
-    def place_market_order(self, symbol, order_type_str, atr=None, confidence=0.0):
-        tick = get_symbol_info_tick(symbol)
+    def place_market_order(self, symbol, order_type_str, atr=None, confidence=0.0, strategy="manual", signal_time=None):
+        tick = self.market.tick(symbol)
         if not tick:
             return False, "Tick data unavailable"
 
-        point = mt5.symbol_info(symbol).point
-        
-        point = mt5.symbol_info(symbol).point
+        spec = self.market.spec(symbol)
+        if not spec:
+            return False, "Symbol info unavailable"
+        point = spec.point
         
         # --- LOT SIZING ---
         from config import USE_DYNAMIC_SIZING, LOT_SIZE
@@ -59,7 +77,7 @@ class OrderManager:
         if USE_DYNAMIC_SIZING:
             # --- DYNAMIC LOT SIZING CALCULATION ---
             # Get Equity
-            account = mt5.account_info()
+            account = get_account_info()
             equity = account.equity if account else 20000.0 # Fallback
             
             # Base Calc: $20k -> 1.0 Lot
@@ -84,8 +102,8 @@ class OrderManager:
 
         # Dynamic Risk Calculation
         # Default fallback to config if ATR is missing or 0
-        sl_points = STOP_LOSS
-        tp_points = TAKE_PROFIT
+        sl_points = config.STOP_LOSS
+        tp_points = config.TAKE_PROFIT
         
         if atr and atr > 0:
             # User Strategy: Aggressive Scalp
@@ -122,36 +140,88 @@ class OrderManager:
             "price": price,
             "sl": sl,
             "tp": tp,
-            "deviation": 20, # Slippage tolerance
+            "deviation": config.ORDER_DEVIATION, # Slippage tolerance
             "magic": MAGIC_NUMBER,
-            "comment": "ReAct Agent",
+            "comment": f"ReAct {strategy}", # Strategy tag, read back by PortfolioAnalytics
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
 
         # Send order
-        result = mt5.order_send(request)
-        
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
+        send_time = time.time()
+        result = send_order(request)
+        return_time = time.time()
+
+        self.record_fill(symbol, order_type_str, strategy, signal_time, send_time, return_time, price, point, result)
+
+        if result is None:
+            logger.error(f"Order failed: order_send returned None, error={get_last_error()}")
+            return False, "MT5 Error: no result"
+
+        if result.retcode not in FILLED_RETCODES:
             logger.error(f"Order failed: {result.comment}, retcode={result.retcode}")
             return False, f"MT5 Error: {result.comment}"
         
+        self.market.sync_positions(symbol) # New position counts towards MAX_OPEN_TRADES right away
         logger.info(f"Order placed: {order_type_str} {symbol} @ {price}, Ticket={result.order}")
         return True, f"Executed {order_type_str} {symbol}"
 
+    def record_fill(self, symbol, side, strategy, signal_time, send_time, return_time, requested_price, point, result):
+        """Writes the signal/send/return timestamps and requested vs filled price to the execution journal."""
+        filled = result is not None and result.retcode in FILLED_RETCODES
+        filled_price = None
+        if filled:
+            filled_price = result.price
+            if not filled_price:
+                # Some brokers return price=0 in the send result; take it from the deal instead
+                deal = get_deal(result.deal)
+                filled_price = deal.price if deal else None
+
+        record = {
+            "symbol": symbol,
+            "strategy": strategy,
+            "side": side,
+            "retcode": result.retcode if result is not None else None,
+            "ticket": result.order if result is not None else None,
+            "filled": filled,
+            "signal_time": signal_time,
+            "send_time": send_time,
+            "return_time": return_time,
+            "requested_price": requested_price,
+            "filled_price": filled_price,
+            "point": point,
+        }
+        try:
+            record_execution(record)
+        except Exception as e:
+            logger.error(f"Failed to record execution: {e}")
+        exporter.record("executions", record)
+
+        if filled_price and point:
+            slip = (filled_price - requested_price) / point
+            if side == "SELL": slip = -slip
+            logger.info(f"Execution {symbol} {side}: requested {requested_price}, filled {filled_price} (slippage {slip:.1f} pts), round trip {(return_time - send_time) * 1000:.0f} ms")
+
     def close_all_positions(self, symbol):
-        positions = get_open_positions(symbol)
+        self.market.sync_positions(symbol)
+        positions = list(self.market.positions.for_symbol(symbol))
         if not positions:
             return True, "No positions to close."
 
+        spec = self.market.spec(symbol)
+        point = spec.point if spec else None # Journal still records the close, without slippage
+
         count = 0
         for pos in positions:
-            tick = get_symbol_info_tick(symbol)
+            tick = self.market.tick(symbol)
+            if not tick:
+                logger.error(f"Close skipped for ticket {pos.ticket}: tick data unavailable")
+                continue
             # To close a BUY, we SELL. To close a SELL, we BUY.
             # But specific closing logic usually uses the opposite price.
             # MT5 closing involves sending an opposite deal.
             
-            close_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
+            close_type = mt5.ORDER_TYPE_SELL if pos.is_buy else mt5.ORDER_TYPE_BUY
             price = tick.bid if close_type == mt5.ORDER_TYPE_SELL else tick.ask
             
             request = {
@@ -161,27 +231,36 @@ class OrderManager:
                 "type": close_type,
                 "position": pos.ticket,
                 "price": price,
-                "deviation": 20,
+                "deviation": config.ORDER_DEVIATION,
                 "magic": MAGIC_NUMBER,
                 "comment": "ReAct Close",
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            result = mt5.order_send(request)
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            send_time = time.time()
+            result = send_order(request)
+            return_time = time.time()
+
+            side = "SELL" if close_type == mt5.ORDER_TYPE_SELL else "BUY"
+            self.record_fill(symbol, side, "close", None, send_time, return_time, price, point, result)
+
+            if result is None:
+                logger.error(f"Close failed for ticket {pos.ticket}: terminal unavailable")
+            elif result.retcode not in FILLED_RETCODES:
                 logger.error(f"Close failed for ticket {pos.ticket}: {result.comment}")
             else:
                 count += 1
                 # Calculate approximate PnL for logging usage
                 # Profit = (ClosePrice - OpenPrice) * Volume * ContractSize
                 # Simplified point calculation for logging:
-                diff = (price - pos.price_open) if pos.type == mt5.ORDER_TYPE_BUY else (pos.price_open - price)
+                diff = (price - pos.price_open) if pos.is_buy else (pos.price_open - price)
                 # This doesn't account for tick value perfectly but good enough for relative win/loss check
                 # Actually, MT5 deals return profit? No, we have to wait for deal completion.
                 # Better: Just log the close price.
-                logger.info(f"[TRADE_RESULT] Symbol={symbol} Ticket={pos.ticket} Type={'BUY' if pos.type==mt5.ORDER_TYPE_BUY else 'SELL'} Open={pos.price_open} Close={price} Diff={diff:.5f}")
+                logger.info(f"[TRADE_RESULT] Symbol={symbol} Ticket={pos.ticket} Type={'BUY' if pos.is_buy else 'SELL'} Open={pos.price_open} Close={price} Diff={diff:.5f}")
 
+        self.market.sync_positions(symbol)
         return True, f"Closed {count} positions."
 
     def manage_risk(self, symbol, atr):
@@ -189,25 +268,27 @@ class OrderManager:
         Adjusts SL/TP for open positions:
         1. Break Even: If Price > Entry + 0.5*ATR, move SL to Entry.
         2. Trailing Stop: If Price > Entry + 1.0*ATR, Trail SL at 0.5*ATR distance.
+        Reads positions from the shared PositionBook (synced once per cycle).
         """
         if not atr or atr <= 0:
             return
-            
-        positions = get_open_positions(symbol)
-        if not positions:
+
+        if not self.market.positions.count(symbol):
             return
 
-        tick = get_symbol_info_tick(symbol)
+        tick = self.market.tick(symbol)
         if not tick: return
         
-        point = mt5.symbol_info(symbol).point
+        spec = self.market.spec(symbol)
+        if not spec: return
+        point = spec.point
         be_trigger_dist = 0.5 * atr
         trail_trigger_dist = 1.0 * atr
         trail_dist = 0.5 * atr # Trail behind by 0.5 ATR
 
-        for pos in positions:
+        for pos in self.market.positions.for_symbol(symbol):
             # Check for BUY
-            if pos.type == mt5.ORDER_TYPE_BUY:
+            if pos.is_buy:
                 current_profit_dist = tick.bid - pos.price_open
                 
                 # Check Break Even
@@ -223,21 +304,10 @@ class OrderManager:
                             if trail_sl > new_sl:
                                 new_sl = trail_sl
                                 
-                        # Execute Modification
-                        request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "position": pos.ticket,
-                            "symbol": symbol,
-                            "sl": new_sl,
-                            "tp": pos.tp, # Keep TP same
-                            "magic": MAGIC_NUMBER,
-                        }
-                        res = mt5.order_send(request)
-                        if res.retcode == mt5.TRADE_RETCODE_DONE:
-                            logger.info(f"Managed Risk {symbol} #{pos.ticket}: SL moved to {new_sl} (Profit Dist: {current_profit_dist:.5f})")
+                        self.modify_sl(pos, new_sl, current_profit_dist)
 
             # Check for SELL
-            elif pos.type == mt5.ORDER_TYPE_SELL:
+            else:
                 current_profit_dist = pos.price_open - tick.ask
                 
                 # Check Break Even
@@ -253,15 +323,16 @@ class OrderManager:
                             if trail_sl < new_sl:
                                 new_sl = trail_sl
                                 
-                        # Execute Modification
-                        request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "position": pos.ticket,
-                            "symbol": symbol,
-                            "sl": new_sl,
-                            "tp": pos.tp,
-                            "magic": MAGIC_NUMBER,
-                        }
-                        res = mt5.order_send(request)
-                        if res.retcode == mt5.TRADE_RETCODE_DONE:
-                            logger.info(f"Managed Risk {symbol} #{pos.ticket}: SL moved to {new_sl} (Profit Dist: {current_profit_dist:.5f})")
+                        self.modify_sl(pos, new_sl, current_profit_dist)
+
+    def modify_sl(self, pos, new_sl, profit_dist):
+        """Sends an SL change (TP kept) and updates the Position record on success."""
+        request = self._sltp_request
+        request["position"] = pos.ticket
+        request["symbol"] = pos.symbol
+        request["sl"] = new_sl
+        request["tp"] = pos.tp # Keep TP same
+        res = send_order(request)
+        if res is not None and res.retcode == mt5.TRADE_RETCODE_DONE:
+            pos.sl = new_sl
+            logger.info(f"Managed Risk {pos.symbol} #{pos.ticket}: SL moved to {new_sl} (Profit Dist: {profit_dist:.5f})")
@@ -0,0 +1,287 @@
+import json
+import math
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+from core.mt5_interface import get_deals
+from core.connection_manager import connection
+from core.exporter import exporter
+from config import (MAGIC_NUMBER, TRADES_FILE, PORTFOLIO_SNAPSHOT, ANALYTICS_HISTORY_DAYS,
+                    ANALYTICS_SNAPSHOT_SECONDS, ANALYTICS_SHARPE_WINDOW, ANALYTICS_CURVE_POINTS,
+                    ensure_log_dir)
+from utils.logger import setup_logger
+
+logger = setup_logger("Portfolio")
+
+# Deal history is queried with this overlap so broker/server timezone offsets
+# can't make us miss deals. Duplicates are dropped by deal ticket.
+SYNC_OVERLAP = timedelta(days=1)
+STRATEGY_PREFIX = "ReAct " # OrderManager tags orders as "ReAct <strategy>"
+
+
+class RunningStats:
+    """
+    Portfolio statistics updated in O(1) per closed trade:
+    equity curve, max drawdown, profit factor, expectancy and a rolling Sharpe
+    (per-trade mean / std over the last ANALYTICS_SHARPE_WINDOW trades).
+    """
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.window = deque(maxlen=ANALYTICS_SHARPE_WINDOW)
+        self.window_sum = 0.0
+        self.window_sumsq = 0.0
+        self.curve = deque(maxlen=ANALYTICS_CURVE_POINTS) # (time, equity)
+
+    def update(self, pnl, t):
+        self.trades += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        else:
+            self.gross_loss -= pnl
+
+        self.equity += pnl
+        if self.equity > self.peak:
+            self.peak = self.equity
+        drawdown = self.peak - self.equity
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        self.curve.append((t, round(self.equity, 2)))
+
+        # Rolling window: drop the value that falls out before appending
+        if len(self.window) == self.window.maxlen:
+            old = self.window[0]
+            self.window_sum -= old
+            self.window_sumsq -= old * old
+        self.window.append(pnl)
+        self.window_sum += pnl
+        self.window_sumsq += pnl * pnl
+
+    def sharpe(self):
+        n = len(self.window)
+        if n < 2:
+            return None
+        mean = self.window_sum / n
+        var = (self.window_sumsq - n * mean * mean) / (n - 1)
+        if var <= 0:
+            return None
+        return mean / math.sqrt(var)
+
+    def summary(self):
+        sharpe = self.sharpe()
+        return {
+            "trades": self.trades,
+            "wins": self.wins,
+            "losses": self.trades - self.wins,
+            "win_rate": round(self.wins / self.trades * 100, 2) if self.trades else 0.0,
+            "net_profit": round(self.equity, 2),
+            "profit_factor": round(self.gross_profit / self.gross_loss, 3) if self.gross_loss else None,
+            "expectancy": round(self.equity / self.trades, 2) if self.trades else 0.0,
+            "max_drawdown": round(self.max_drawdown, 2),
+            "current_drawdown": round(self.peak - self.equity, 2),
+            "rolling_sharpe": round(sharpe, 3) if sharpe is not None else None,
+        }
+
+    def to_dict(self):
+        state = {k: getattr(self, k) for k in ("trades", "wins", "gross_profit", "gross_loss", "equity", "peak", "max_drawdown")}
+        state["window"] = list(self.window)
+        state["curve"] = list(self.curve)
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls()
+        for k in ("trades", "wins", "gross_profit", "gross_loss", "equity", "peak", "max_drawdown"):
+            setattr(stats, k, state[k])
+        for pnl in state["window"]:
+            stats.window.append(pnl)
+            stats.window_sum += pnl
+            stats.window_sumsq += pnl * pnl
+        stats.curve.extend(tuple(p) for p in state["curve"])
+        return stats
+
+
+class PortfolioAnalytics:
+    """
+    Keeps RunningStats for the whole account ("ALL"), per symbol and per strategy.
+    sync() pulls only the deals added since the last sync from history_deals_get,
+    so the cost per call is proportional to new deals, not total history.
+    State is served from memory and persisted as a periodic JSON snapshot,
+    which is also what the API's /stats endpoint reads.
+    """
+
+    def __init__(self, snapshot_path=PORTFOLIO_SNAPSHOT):
+        self.snapshot_path = snapshot_path
+        self.stats = {}
+        self.position_strategy = {} # position_id -> strategy (from the entry deal comment)
+        self.position_commission = {} # position_id -> entry deal commission, charged at the first exit
+        self.position_volume = {} # position_id -> open volume; all three maps are cleared once it reaches 0
+        self.last_ticket = 0
+        self.last_sync = None
+        self.last_snapshot = 0.0
+        self.journal_ticket = self._journal_watermark() # Deals already in TRADES_FILE
+        self.load_snapshot()
+
+    def _bucket(self, key):
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = RunningStats()
+        return stats
+
+    def sync(self):
+        """Applies new closed deals. Returns the number of trades added."""
+        if not connection.is_available():
+            return 0 # Keep last_sync so the next sync covers the outage
+        now = datetime.now()
+        date_from = (self.last_sync - SYNC_OVERLAP) if self.last_sync else now - timedelta(days=ANALYTICS_HISTORY_DAYS)
+        deals = get_deals(date_from, now + SYNC_OVERLAP)
+        self.last_sync = now
+
+        added = []
+        for deal in sorted(deals, key=lambda d: d.ticket):
+            if deal.ticket <= self.last_ticket or deal.magic != MAGIC_NUMBER:
+                continue
+            self.last_ticket = deal.ticket
+
+            if deal.entry == mt5.DEAL_ENTRY_IN:
+                strategy = deal.comment[len(STRATEGY_PREFIX):] if deal.comment.startswith(STRATEGY_PREFIX) else "unknown"
+                self.position_strategy[deal.position_id] = strategy
+                self.position_commission[deal.position_id] = self.position_commission.get(deal.position_id, 0.0) + deal.commission
+                self.position_volume[deal.position_id] = self.position_volume.get(deal.position_id, 0.0) + deal.volume
+                continue
+
+            if deal.entry not in (mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_INOUT):
+                continue
+
+            # Round-trip cost: the entry commission is part of the trade's result
+            pnl = deal.profit + deal.commission + deal.swap + self.position_commission.pop(deal.position_id, 0.0)
+            strategy = self.position_strategy.get(deal.position_id, "unknown")
+            self._reduce_position(deal)
+            for key in ("ALL", f"symbol:{deal.symbol}", f"strategy:{strategy}"):
+                self._bucket(key).update(pnl, deal.time)
+            added.append({
+                "ticket": deal.ticket,
+                "symbol": deal.symbol,
+                "strategy": strategy,
+                "time": deal.time,
+                "volume": deal.volume,
+                "profit": pnl,
+            })
+
+        if added:
+            self._journal(added)
+            logger.info(f"Portfolio: +{len(added)} closed trades, net {self.stats['ALL'].equity:.2f}")
+        # Save with every new trade, so a killed process can't leave the
+        # last_ticket watermark behind the journal
+        if added or time.time() - self.last_snapshot >= ANALYTICS_SNAPSHOT_SECONDS:
+            self.save_snapshot()
+        return len(added)
+
+    def _reduce_position(self, deal):
+        """Books an exit against the open volume and forgets the position once it is flat."""
+        open_volume = self.position_volume.get(deal.position_id)
+        # INOUT (netting reversal) leaves the excess open in the opposite direction
+        remaining = (abs(deal.volume - open_volume) if deal.entry == mt5.DEAL_ENTRY_INOUT else open_volume - deal.volume) if open_volume else 0.0
+        if remaining > 1e-9:
+            self.position_volume[deal.position_id] = remaining
+        else:
+            # Flat, or opened before the loaded history (volume unknown)
+            self.position_volume.pop(deal.position_id, None)
+            self.position_strategy.pop(deal.position_id, None)
+            self.position_commission.pop(deal.position_id, None)
+
+    def _journal_watermark(self):
+        """Highest deal ticket in TRADES_FILE. Rows are appended in ticket order, so only the tail is read."""
+        try:
+            with open(TRADES_FILE, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                tail = f.read().decode("utf-8", "ignore").splitlines()
+        except OSError:
+            return 0
+        for line in reversed(tail):
+            try:
+                return int(json.loads(line)["ticket"])
+            except (ValueError, KeyError, TypeError):
+                continue # Partial first line of the tail, or a row written before tickets were recorded
+        return 0
+
+    def _journal(self, trades):
+        """
+        Appends closed trades to TRADES_FILE (input for backtest.monte_carlo) and the Parquet export.
+        Deals already journaled are skipped, e.g. when history is rebuilt after a lost snapshot.
+        """
+        trades = [t for t in trades if t["ticket"] > self.journal_ticket]
+        if not trades:
+            return
+        ensure_log_dir()
+        with open(TRADES_FILE, "a") as f:
+            for t in trades:
+                f.write(json.dumps(t) + "\n")
+        self.journal_ticket = trades[-1]["ticket"]
+        for t in trades:
+            exporter.record("trades", t)
+
+    def summary(self):
+        """Per-bucket summary plus the account equity curve, straight from memory."""
+        overall = self.stats.get("ALL") or RunningStats()
+        return {
+            "overall": overall.summary(),
+            "by_symbol": {k.split(":", 1)[1]: s.summary() for k, s in self.stats.items() if k.startswith("symbol:")},
+            "by_strategy": {k.split(":", 1)[1]: s.summary() for k, s in self.stats.items() if k.startswith("strategy:")},
+            "equity_curve": list(overall.curve),
+            "last_sync": self.last_sync.isoformat() if self.last_sync else None,
+        }
+
+    def save_snapshot(self):
+        state = {
+            "summary": self.summary(),
+            "state": {
+                "last_ticket": self.last_ticket,
+                "last_sync": self.last_sync.isoformat() if self.last_sync else None,
+                "position_strategy": self.position_strategy,
+                "position_commission": self.position_commission,
+                "position_volume": self.position_volume,
+                "stats": {k: s.to_dict() for k, s in self.stats.items()},
+            },
+        }
+        ensure_log_dir()
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.snapshot_path) # Atomic: the API never reads a half-written file
+        self.last_snapshot = time.time()
+
+    def load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r") as f:
+                state = json.load(f)["state"]
+            self.last_ticket = state["last_ticket"]
+            self.last_sync = datetime.fromisoformat(state["last_sync"]) if state["last_sync"] else None
+            self.position_strategy = {int(k): v for k, v in state["position_strategy"].items()}
+            self.position_commission = {int(k): v for k, v in state.get("position_commission", {}).items()}
+            self.position_volume = {int(k): v for k, v in state.get("position_volume", {}).items()}
+            self.stats = {k: RunningStats.from_dict(s) for k, s in state["stats"].items()}
+            logger.info(f"Portfolio snapshot loaded ({self.stats['ALL'].trades if 'ALL' in self.stats else 0} trades).")
+        except Exception as e:
+            logger.error(f"Failed to load portfolio snapshot, rebuilding from history: {e}")
+            self.stats = {}
+            self.position_strategy = {}
+            self.position_commission = {}
+            self.position_volume = {}
+            self.last_ticket = 0
+            self.last_sync = None
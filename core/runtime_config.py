@@ -0,0 +1,102 @@
+import json
+import os
+import config
+from config import RUNTIME_CONFIG_FILE, ensure_log_dir
+from utils.logger import setup_logger
+
+logger = setup_logger("RuntimeConfig")
+
+# Settings that can change without restarting the agent: name -> (type, check, rule).
+# USE_DYNAMIC_SIZING is left out: its sizing constants are not defined in config.py.
+# Anything else in the override file is rejected.
+RELOADABLE = {
+    "LOT_SIZE": (float, lambda v: 0 < v <= 100, "0 < LOT_SIZE <= 100"),
+    "MAX_OPEN_TRADES": (int, lambda v: v >= 1, "MAX_OPEN_TRADES >= 1"),
+    "STOP_LOSS": (float, lambda v: v > 0, "STOP_LOSS > 0"),
+    "TAKE_PROFIT": (float, lambda v: v > 0, "TAKE_PROFIT > 0"),
+    "ORDER_DEVIATION": (int, lambda v: v >= 0, "ORDER_DEVIATION >= 0"),
+    "SYMBOLS": (list, lambda v: len(v) > 0 and all(isinstance(s, str) and s for s in v), "non-empty list of symbol names"),
+}
+
+
+def validate(overrides):
+    """Returns (clean, errors). Ints are accepted for float settings."""
+    clean, errors = {}, []
+    if not isinstance(overrides, dict):
+        return {}, ["Config must be a JSON object"]
+
+    for key, value in overrides.items():
+        if key not in RELOADABLE:
+            errors.append(f"{key}: not reloadable")
+            continue
+        expected, check, rule = RELOADABLE[key]
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            errors.append(f"{key}: expected {expected.__name__}")
+        elif not check(value):
+            errors.append(f"{key}: must satisfy {rule}")
+        else:
+            clean[key] = value
+    return clean, errors
+
+
+def write_overrides(overrides, path=RUNTIME_CONFIG_FILE):
+    """Validates and atomically writes the override file (used by the API)."""
+    clean, errors = validate(overrides)
+    if errors:
+        return errors
+    ensure_log_dir()
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(clean, f, indent=2)
+    os.replace(tmp, path)
+    return []
+
+
+def read_overrides(path=RUNTIME_CONFIG_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class RuntimeConfig:
+    """
+    Watches RUNTIME_CONFIG_FILE and applies changes to the `config` module.
+    check() is called by the agent at a cycle boundary only, so a cycle never
+    sees half-old, half-new settings. Invalid files are rejected as a whole.
+    """
+
+    def __init__(self, path=RUNTIME_CONFIG_FILE):
+        self.path = path
+        self.mtime = None
+        # config.py values, restored when a key is removed from the override file
+        self.defaults = {k: getattr(config, k) for k in RELOADABLE}
+
+    def check(self):
+        """Returns {name: new_value} for settings that changed, else {}."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return {}
+        if mtime == self.mtime:
+            return {}
+        self.mtime = mtime
+
+        try:
+            overrides = read_overrides(self.path)
+        except ValueError as e:
+            logger.error(f"Runtime config rejected (invalid JSON): {e}")
+            return {}
+        clean, errors = validate(overrides)
+        if errors:
+            logger.error(f"Runtime config rejected: {errors}")
+            return {}
+
+        wanted = dict(self.defaults, **clean)
+        changes = {k: v for k, v in wanted.items() if getattr(config, k) != v}
+        for key, value in changes.items():
+            logger.info(f"Config reload: {key} {getattr(config, key)} -> {value}")
+            setattr(config, key, value)
+        return changes
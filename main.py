@@ -1,35 +1,132 @@
+from utils.startup_timer import startup_timer # First import: starts the startup clock
 import time
-import schedule
 import sys
-from config import SYMBOLS
-from core.mt5_interface import initialize_mt5, shutdown_mt5
-from agent.rule_scalper import RuleBasedScalper
+import os
+import threading
+import config
+from config import SCANNER_ENABLED, SCANNER_WATCHLIST, TIMEFRAME_MINUTES
 from utils.logger import setup_logger
 
 logger = setup_logger("Main")
 
+released = False # Set once this agent has handed over to a standby
+
 def job():
+    global released
+    # Cycle boundary: settings changed through POST /config take effect here, never mid-cycle
+    changes = runtime_config.check()
+    if changes:
+        agent.apply_config(changes)
+
     agent.run_cycle()
 
+    if handover.takeover_requested():
+        agent.portfolio.save_snapshot() # The standby reloads it after the release
+        handover.release()
+        released = True
+        logger.info("Handed over to standby agent. Exiting.")
+
+def schedule_on_bar_close(scheduler, fn):
+    """Runs fn 1s after every bar close of TIMEFRAME_MINUTES (M1..M30, H1, H4, ...)."""
+    if TIMEFRAME_MINUTES == 1:
+        scheduler.every().minute.at(":01").do(fn)
+    elif TIMEFRAME_MINUTES < 60:
+        for minute in range(0, 60, TIMEFRAME_MINUTES):
+            scheduler.every().hour.at(f"{minute:02d}:01").do(fn)
+    elif TIMEFRAME_MINUTES == 60:
+        scheduler.every().hour.at("00:01").do(fn)
+    else:
+        for hour in range(0, 24, TIMEFRAME_MINUTES // 60):
+            scheduler.every().day.at(f"{hour:02d}:00:01").do(fn)
+
+def import_strategy_modules():
+    """Heavy imports (pandas/numpy strategy code), run in parallel with the terminal connect."""
+    with startup_timer.phase("import strategy"):
+        import agent.rule_scalper
+        import core.market_scanner
+
 if __name__ == "__main__":
-    if not initialize_mt5():
+    standby = "--standby" in sys.argv # Warm standby: prepare everything, take over on release
+    active = not standby # A standby owns the shared state files only once it has taken over
+    with startup_timer.phase("import mt5"):
+        import schedule
+        from core.mt5_interface import initialize_mt5, shutdown_mt5, get_market_watch_symbols, warm_up
+        from core.connection_manager import connection
+        from core.runtime_config import RuntimeConfig
+        from core import handover
+
+    if not standby:
+        handover.clear() # Stale files from a previous run
+
+    importer = threading.Thread(target=import_strategy_modules, daemon=True)
+    importer.start()
+
+    with startup_timer.phase("mt5 initialize"):
+        connected = initialize_mt5()
+    if not connected:
         sys.exit(1)
 
     try:
         logger.info("Starting Rule-Based Scalper (No AI Model)...")
-        agent = RuleBasedScalper(SYMBOLS)
-        
-        # Schedule the job to run every minute (or 5 minutes based on candle close)
-        # We run M1 check.
-        schedule.every(1).minutes.do(job)
-        
+        importer.join()
+        from agent.rule_scalper import RuleBasedScalper
+        from core.market_scanner import MarketScanner
+        import MetaTrader5 as mt5
+
+        # Overrides written through the API persist across restarts
+        runtime_config = RuntimeConfig()
+        runtime_config.check()
+
+        watchlist = config.SYMBOLS
+        if SCANNER_ENABLED:
+            watchlist = SCANNER_WATCHLIST or get_market_watch_symbols()
+            logger.info(f"Scanner mode: {len(watchlist)} symbols in watchlist.")
+
+        # Select symbols and pull M1/M5 bars up front so the first cycle hits hot caches
+        timeframes = [mt5.TIMEFRAME_M1, mt5.TIMEFRAME_M5]
+        with startup_timer.phase("warm-up"):
+            warm_up(watchlist, timeframes)
+
+        scanner = MarketScanner(watchlist) if SCANNER_ENABLED else None
+        agent = RuleBasedScalper(config.SYMBOLS, scanner=scanner)
+
+        # After a terminal drop: re-select symbols, re-warm bars, drop stale agent state
+        connection.on_reconnect(lambda: warm_up(scanner.symbols if scanner else agent.symbols, timeframes))
+        connection.on_reconnect(agent.resync)
+
+        if standby:
+            handover.request_takeover(os.getpid())
+            logger.info("Standby ready. Waiting for the active agent to hand over...")
+            # The active agent releases after its next cycle, so at most one bar plus a cycle
+            released_at = handover.wait_for_release(timeout=TIMEFRAME_MINUTES * 60 * 2)
+            if released_at is None:
+                handover.clear()
+                logger.error("Active agent did not release. Standby exiting.")
+                sys.exit(1)
+            handover.clear_request()
+            # Positions/stats may have changed while waiting
+            agent.market.sync_positions()
+            agent.portfolio.load_snapshot()
+            active = True
+            logger.info(f"Takeover complete: switchover {(time.time() - released_at) * 1000:.1f} ms.")
+
+        # Schedule the job on the bar boundary (1s after candle close) instead of
+        # "every N minutes from now", which drifts whenever a cycle runs long.
+        # Lateness/overruns are tracked by the agent's CycleBudget.
+        # A standby schedules only after takeover, so the bar the old agent just
+        # processed isn't run again: its first cycle is the next bar boundary.
+        schedule_on_bar_close(schedule, job)
+
+        startup_timer.report(logger, "Agent")
         logger.info("Agent started. Running schedule...")
-        
+
         # Run once immediately on startup
-        job()
-        
-        while True:
+        if not standby:
+            job()
+
+        while not released:
             schedule.run_pending()
+            connection.check() # Heartbeat: detect drops and reconnect between cycles
             time.sleep(1)
 
     except KeyboardInterrupt:
@@ -37,4 +134,10 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"Critical error: {e}")
     finally:
+        # A standby that never took over must not overwrite the active agent's snapshot
+        if "agent" in globals() and active and not released:
+            agent.portfolio.save_snapshot()
+        if "agent" in globals() and active:
+            from core.exporter import exporter
+            exporter.close() # Flush buffered export rows
         shutdown_mt5()
@@ -1,6 +1,6 @@
 import logging
 import sys
-from config import LOG_FILE
+from config import LOG_FILE, ensure_log_dir
 
 def setup_logger(name="TradingAgent"):
     logger = logging.getLogger(name)
@@ -17,6 +17,7 @@ def setup_logger(name="TradingAgent"):
     logger.addHandler(c_handler)
 
     # File Handler
+    ensure_log_dir()
     f_handler = logging.FileHandler(LOG_FILE)
     f_handler.setLevel(logging.INFO)
     f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+
+# Startup timing instrumentation.
+# Import this module first so the clock starts as early as possible, then wrap
+# each import / initialization phase in `with startup_timer.phase("name"):`.
+
+
+class StartupTimer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = [] # (name, duration_ms)
+        self.ready_ms = None # Set once by mark_ready()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.t0) * 1000
+
+    def mark_ready(self):
+        """Freezes the startup time; later calls keep the first value."""
+        if self.ready_ms is None:
+            self.ready_ms = self.elapsed_ms()
+        return self.ready_ms
+
+    def report(self, logger, label="Startup"):
+        breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases)
+        logger.info(f"{label} ready in {self.mark_ready():.0f} ms ({breakdown})")
+
+    def as_dict(self):
+        """Startup time (None until mark_ready), not time since process start."""
+        return {
+            "total_ms": round(self.ready_ms, 1) if self.ready_ms is not None else None,
+            "phases_ms": {name: round(ms, 1) for name, ms in self.phases},
+        }
+
+
+startup_timer = StartupTimer()